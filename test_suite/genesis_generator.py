@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterator, List, Optional
+
+from .json_rpc_api.key_store import DEFAULT_KEY_STORE_PATH, PRIVATE_KEY_SIZE, PUBLIC_KEY_SIZE, derive_key_record, \
+    write_key_store
+from .json_rpc_api.wallet_pool import DEFAULT_SEED
+
+DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_CONFIG_PATHS = [
+    os.path.join(DIR_PATH, '..', 'tbears_server_config.json'),
+    os.path.join(DIR_PATH, 'tbears_server_config.json')
+]
+DEFAULT_NAME_PREFIX = 'test_wallet'
+DEFAULT_BALANCE = 10_000
+ICX_FACTOR = 10 ** 18
+CHUNK_SIZE = 1024
+
+
+def generate_key_records(count: int, seed: str = DEFAULT_SEED, start: int = 0) -> Iterator[bytes]:
+    derive = partial(derive_key_record, seed)
+    with ProcessPoolExecutor() as executor:
+        yield from executor.map(derive, range(start, start + count), chunksize=CHUNK_SIZE)
+
+
+def make_genesis_accounts(records: List[bytes], balance: int, name_prefix: str = DEFAULT_NAME_PREFIX) -> List[dict]:
+    address_offset = PRIVATE_KEY_SIZE + PUBLIC_KEY_SIZE
+    return [
+        {
+            "name": f"{name_prefix}{i}",
+            "address": f"hx{record[address_offset:].hex()}",
+            "balance": hex(balance)
+        }
+        for i, record in enumerate(records)
+    ]
+
+
+def update_genesis(config: dict, accounts: List[dict], name_prefix: str = DEFAULT_NAME_PREFIX) -> dict:
+    """Replaces the generated accounts of an earlier run (matched by name prefix), keeping the others."""
+    genesis = config.setdefault('genesis', {})
+    kept = [account for account in genesis.get('accounts', []) if not account['name'].startswith(name_prefix)]
+    genesis['accounts'] = kept + accounts
+    return config
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate pre-funded genesis accounts and their key store")
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--balance', type=int, default=DEFAULT_BALANCE, help="ICX per account")
+    parser.add_argument('--seed', default=DEFAULT_SEED, help="the wallet pool seed, so pooled wallets come funded")
+    parser.add_argument('--start', type=int, default=0, help="first derivation index")
+    parser.add_argument('--name-prefix', default=DEFAULT_NAME_PREFIX)
+    parser.add_argument('--config', nargs='+', default=DEFAULT_CONFIG_PATHS, help="tbears configs updated in place")
+    parser.add_argument('--key-store', default=DEFAULT_KEY_STORE_PATH)
+    args = parser.parse_args(argv)
+
+    records = list(generate_key_records(args.count, args.seed, args.start))
+    write_key_store(args.key_store, args.seed, args.start, args.count, records)
+
+    accounts = make_genesis_accounts(records, args.balance * ICX_FACTOR, args.name_prefix)
+    for config_path in args.config:
+        with open(config_path) as f:
+            config = json.load(f)
+        with open(config_path, 'w') as f:
+            json.dump(update_genesis(config, accounts, args.name_prefix), f, indent=4)
+            f.write('\n')
+
+    print(f"{args.count} accounts of {args.balance} ICX written to {', '.join(args.config)}, keys to {args.key_store}")
+
+
+if __name__ == '__main__':
+    main()
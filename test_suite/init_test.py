@@ -2,7 +2,7 @@ import os
 
 from iconservice.icon_constant import REV_IISS
 
-from .json_rpc_api.base import Base, GOVERNANCE_ADDRESS
+from .json_rpc_api.base import Base, GOVERNANCE_ADDRESS, USE_SNAPSHOT
 
 DIR_PATH = os.path.abspath(os.path.dirname(__file__))
 
@@ -13,6 +13,7 @@ GOVERNANCE_SCORES = [
 
 
 class TestInit(Base):
+    RESTORE_SNAPSHOT = False
 
     def setUp(self):
         super().setUp()
@@ -26,3 +27,7 @@ class TestInit(Base):
 
         tx = self.create_set_revision_tx(self._test1, REV_IISS)
         self.process_transaction(tx, self.icon_service)
+
+        # later test classes start from here instead of replaying the setup
+        if USE_SNAPSHOT:
+            self.capture_snapshot()
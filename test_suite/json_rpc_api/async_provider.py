@@ -0,0 +1,123 @@
+import asyncio
+import json
+from itertools import count
+from time import perf_counter
+from typing import Optional, Union
+
+import aiohttp
+from iconsdk.builder.call_builder import Call
+from iconsdk.converter import convert_block, convert_transaction_result
+from iconsdk.exception import JSONRPCException, URLException
+from iconsdk.signed_transaction import SignedTransaction
+
+from .batch_provider import convert_call_to_params
+from .metrics import get_metrics
+
+DEFAULT_MAX_IN_FLIGHT = 64
+DEFAULT_TIMEOUT = 10
+
+
+class AsyncHTTPProvider:
+    """
+    asyncio counterpart of iconsdk's HTTPProvider.
+    At most `max_in_flight` requests are on the wire at once; the rest wait on a semaphore.
+    The session and semaphore are bound to the loop running the first request.
+    """
+
+    def __init__(self,
+                 full_path_url: str,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self._full_path_url = full_path_url
+        self._max_in_flight = max_in_flight
+        self._timeout = timeout
+        self._ids = count(1)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def __str__(self):
+        return f"Async RPC connection {self._full_path_url}"
+
+    def _open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._max_in_flight)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self._timeout))
+            self._semaphore = asyncio.Semaphore(self._max_in_flight)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._semaphore = None
+
+    async def make_request(self, method: str, params=None, full_response: bool = False) -> Union[str, list, dict]:
+        self._open()
+
+        rpc_dict = {
+            'jsonrpc': '2.0',
+            'method': method,
+            'id': next(self._ids)
+        }
+        if params:
+            rpc_dict['params'] = params
+
+        async with self._semaphore:
+            # timed from when the request may go out, not from when it was queued
+            start = perf_counter()
+            try:
+                async with self._session.post(self._full_path_url,
+                                              data=json.dumps(rpc_dict),
+                                              headers={'Content-Type': 'application/json'}) as response:
+                    status = response.status
+                    content = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                get_metrics().observe('async', rpc_dict, perf_counter() - start, None)
+                raise
+
+        try:
+            content_as_dict = json.loads(content)
+        except ValueError:
+            get_metrics().observe('async', rpc_dict, perf_counter() - start, None)
+            raise URLException(content.decode('utf-8'))
+        get_metrics().observe('async', rpc_dict, perf_counter() - start, content_as_dict)
+
+        if full_response:
+            return content_as_dict
+        if 200 <= status < 300 and 'result' in content_as_dict:
+            return content_as_dict['result']
+        raise JSONRPCException(content_as_dict['error'])
+
+
+class AsyncIconService:
+    """Subset of iconsdk's IconService used by `Base`, returning the same converted results."""
+
+    def __init__(self, provider: 'AsyncHTTPProvider'):
+        self.__provider = provider
+
+    @property
+    def provider(self) -> 'AsyncHTTPProvider':
+        return self.__provider
+
+    async def get_block(self, value: Union[int, str]) -> dict:
+        if value == 'latest':
+            result = await self.__provider.make_request('icx_getLastBlock')
+        else:
+            result = await self.__provider.make_request('icx_getBlockByHeight', {'height': hex(value)})
+        convert_block(result)
+        return result
+
+    async def get_balance(self, address: str) -> int:
+        result = await self.__provider.make_request('icx_getBalance', {'address': address})
+        return int(result, 16)
+
+    async def get_transaction_result(self, tx_hash: str) -> dict:
+        result = await self.__provider.make_request('icx_getTransactionResult', {'txHash': tx_hash})
+        convert_transaction_result(result)
+        return result
+
+    async def call(self, call: 'Call') -> Union[dict, str]:
+        return await self.__provider.make_request('icx_call', convert_call_to_params(call))
+
+    async def send_transaction(self, signed_transaction: 'SignedTransaction') -> str:
+        return await self.__provider.make_request('icx_sendTransaction', signed_transaction.signed_transaction_dict)
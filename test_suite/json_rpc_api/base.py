@@ -1,32 +1,255 @@
+import asyncio
+import atexit
 import os
-from typing import Dict, Union, List, Tuple, Optional
+import random
+from collections import deque
+from time import sleep, time
+from typing import TYPE_CHECKING, Dict, Union, List, Tuple, Optional, Iterable, Iterator
 
-from iconsdk.builder.call_builder import CallBuilder
-from iconsdk.builder.transaction_builder import DeployTransactionBuilder, TransactionBuilder, CallTransactionBuilder
+from iconsdk.builder.call_builder import Call, CallBuilder
+from iconsdk.builder.transaction_builder import DeployTransactionBuilder, TransactionBuilder, CallTransactionBuilder, \
+    MessageTransactionBuilder, Transaction
+from iconsdk.exception import IconServiceBaseException, JSONRPCException
 from iconsdk.icon_service import IconService
 from iconsdk.libs.in_memory_zip import gen_deploy_data_content
-from iconsdk.providers.http_provider import HTTPProvider
 from iconsdk.signed_transaction import SignedTransaction
 from iconsdk.wallet.wallet import KeyWallet
 from iconservice.base.type_converter_templates import ConstantKeys
 from tbears.libs.icon_integrate_test import IconIntegrateTestBase, SCORE_INSTALL_ADDRESS
 
+from .batch_provider import BatchHTTPProvider, DEFAULT_BATCH_SIZE, convert_call_to_params
+from .delegation_scenario import DelegationScenario
+from .receipt_waiter import ReceiptWaiter
+from .metrics import get_metrics
+from .profiler import get_common_type, get_profiler, get_request_type, profile_phase
+from .responses import DelegationView, IISSInfoView, PRepListView, PRepSummaryView, PRepView, StakeView
+from .session_pool import PooledHTTPProvider
+from .shadow_ledger import ShadowLedger
+from .signer import BulkSigner
+from .term_cache import TermCache
+from .transaction_template import get_transaction_template
+from .unstake_scheduler import UnstakeScheduler
+from .key_store import KeyStore, DEFAULT_KEY_STORE_PATH
+from .wallet_pool import WalletPool, DEFAULT_POOL_PATH
+from ..node_stub import ensure_node_stub, DEFAULT_CONFIG_PATH
+from ..snapshot import ChainSnapshot, DEFAULT_SNAPSHOT_DIR
+
+if TYPE_CHECKING:
+    from .async_provider import AsyncIconService
+
 DIR_PATH = os.path.abspath(os.path.dirname(__file__))
 
 DEFAULT_STEP_LIMIT = 1_000_000
 DEFAULT_NID = 3
 SYSTEM_ADDRESS = "cx0000000000000000000000000000000000000000"
 GOVERNANCE_ADDRESS = "cx0000000000000000000000000000000000000001"
-TEST_HTTP_ENDPOINT_URI_V3 = "http://127.0.0.1:9000/api/v3"
+# the sharded runner points every shard at its own node
+TEST_HTTP_ENDPOINT_URI_V3 = os.environ.get('ICON_TEST_ENDPOINT', "http://127.0.0.1:9000/api/v3")
+WALLET_POOL_PATH = os.environ.get('ICON_TEST_WALLET_POOL', DEFAULT_POOL_PATH)
+# written by test_suite.genesis_generator along with the genesis accounts
+KEY_STORE_PATH = os.environ.get('ICON_TEST_KEY_STORE', DEFAULT_KEY_STORE_PATH)
+NODE_CONFIG_PATH = os.environ.get('ICON_TEST_NODE_CONFIG', DEFAULT_CONFIG_PATH)
+# ICON_TEST_SNAPSHOT=1 (or a directory) starts every test class from the chain captured after TestInit
+SNAPSHOT = os.environ.get('ICON_TEST_SNAPSHOT', '')
+USE_SNAPSHOT = SNAPSHOT not in ('', '0')
+SNAPSHOT_DIR = os.path.abspath(SNAPSHOT) if SNAPSHOT not in ('', '0', '1') else DEFAULT_SNAPSHOT_DIR
+ICX_FACTOR = 10 ** 18
+DEFAULT_MIN_BALANCE = 100 * ICX_FACTOR
+DEFAULT_TOP_UP_BALANCE = 1000 * ICX_FACTOR
+BLOCK_POLL_INTERVAL = 0.1
+PREP_PAGE_SIZE = 100
+PREP_PAGE_PREFETCH = 4
+# transactions process_transaction_stream keeps in flight
+TX_WINDOW = 500
+# delegators a scenario funds, stakes, delegates and checks at a time
+SCENARIO_CHUNK_SIZE = 1000
+# ICON_TEST_NODE_STUB=1 runs the suite against the in-process node stand-in instead of tbears
+USE_NODE_STUB = os.environ.get('ICON_TEST_NODE_STUB', '') not in ('', '0')
+# the stand-in confirms every transaction at once
+BLOCK_CONFIRM_INTERVAL = 0 if USE_NODE_STUB else 1
+# request latencies and failed receipts are written there when the run ends; ICON_TEST_METRICS=0 turns it off
+METRICS = os.environ.get('ICON_TEST_METRICS', '')
+METRICS_DIR = os.path.abspath(METRICS or '.metrics')
+
+
+def dump_metrics():
+    metrics = get_metrics()
+    if METRICS != '0' and not metrics.empty:
+        metrics.dump(METRICS_DIR)
+
+
+atexit.register(dump_metrics)
+
+# ICON_TEST_PROFILE=1 (or a file path) attributes time to build, sign, serialize, send and wait,
+# written as collapsed stacks for flamegraph.pl or speedscope when the run ends
+PROFILE = os.environ.get('ICON_TEST_PROFILE', '')
+PROFILE_PATH = os.path.abspath(PROFILE) if PROFILE not in ('', '0', '1') else os.path.abspath('.profile.folded')
+if PROFILE not in ('', '0'):
+    get_profiler().enable()
+    atexit.register(get_profiler().dump, PROFILE_PATH)
 
 
 class Base(IconIntegrateTestBase):
+    BATCH_SIZE = DEFAULT_BATCH_SIZE
+    # shared by every test in the process so the signing pool is forked only once
+    bulk_signer = BulkSigner()
+    # getIISSInfo, getMainPRepList and getSubPRepList responses, shared as the chain is
+    term_cache = TermCache()
+    _wallet_pool: Optional['WalletPool'] = None
+    RESTORE_SNAPSHOT = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if USE_SNAPSHOT and cls.RESTORE_SNAPSHOT:
+            cls.restore_snapshot()
 
     def setUp(self):
-        super().setUp(block_confirm_interval=1, network_only=True)
+        if USE_NODE_STUB:
+            ensure_node_stub(NODE_CONFIG_PATH)
+        super().setUp(block_confirm_interval=BLOCK_CONFIRM_INTERVAL, network_only=True)
+        get_profiler().set_test(self.id())
 
         # if you want to send request to network, uncomment next line and set self.TEST_HTTP_ENDPOINT_URI_V3
-        self.icon_service = IconService(HTTPProvider(TEST_HTTP_ENDPOINT_URI_V3))
+        # every provider shares the process-wide keep-alive session pool
+        self.icon_service = IconService(PooledHTTPProvider(TEST_HTTP_ENDPOINT_URI_V3))
+
+        # concurrent queries go through `async_*` helpers; run them with `run_async` or `gather`
+        self._async_icon_service: Optional['AsyncIconService'] = None
+        self._loop = asyncio.new_event_loop()
+
+        # read-only sweeps go through `*_batch` helpers as JSON-RPC batch requests
+        self.batch_provider = BatchHTTPProvider(TEST_HTTP_ENDPOINT_URI_V3, batch_size=self.BATCH_SIZE)
+
+        # wallets from `lease_wallets` not released by the test yet
+        self._leased_wallets: List['KeyWallet'] = []
+
+    def tearDown(self):
+        if self._leased_wallets:
+            self.release_wallets(self._leased_wallets)
+
+        if self._async_icon_service is not None:
+            self._loop.run_until_complete(self._async_icon_service.provider.close())
+        self._loop.close()
+
+        super().tearDown()
+        get_profiler().set_test(None)
+
+    @property
+    def async_icon_service(self) -> 'AsyncIconService':
+        # created on first use, so only the tests making concurrent queries need aiohttp
+        if self._async_icon_service is None:
+            from .async_provider import AsyncHTTPProvider, AsyncIconService
+            self._async_icon_service = AsyncIconService(AsyncHTTPProvider(TEST_HTTP_ENDPOINT_URI_V3))
+        return self._async_icon_service
+
+    def run_async(self, coroutine):
+        return self._loop.run_until_complete(coroutine)
+
+    def gather(self, coroutines) -> list:
+        async def _gather():
+            return await asyncio.gather(*coroutines)
+
+        return self.run_async(_gather())
+
+    # ================= Transaction =================
+    def wait_for_receipts(self,
+                          tx_hashes: Iterable[str],
+                          block_confirm_interval: int = -1) -> Iterator[Tuple[str, dict]]:
+        if block_confirm_interval == -1:
+            block_confirm_interval = self._block_confirm_interval
+
+        waiter = ReceiptWaiter(self.batch_provider, block_confirm_interval)
+        for tx_hash in tx_hashes:
+            waiter.add(tx_hash)
+
+        for tx_hash, tx_result in waiter.wait():
+            self._observe_receipt(tx_hash, tx_result)
+            yield tx_hash, tx_result
+
+    def _observe_receipt(self, tx_hash: str, tx_result: dict):
+        if 'blockHeight' in tx_result:
+            self.term_cache.observe(tx_result['blockHeight'])
+
+    def process_transaction(self, request: 'SignedTransaction',
+                            network: IconService = None,
+                            block_confirm_interval: int = -1) -> dict:
+        if network is None:
+            return super().process_transaction(request, network, block_confirm_interval)
+
+        tx_hash: str = network.send_transaction(request)
+        with get_profiler().phase('wait', get_request_type(request.signed_transaction_dict)):
+            for _, tx_result in self.wait_for_receipts([tx_hash], block_confirm_interval):
+                return tx_result
+
+    def process_transaction_stream(self,
+                                   requests: Iterable['SignedTransaction'],
+                                   network: IconService,
+                                   window: int = TX_WINDOW,
+                                   block_confirm_interval: int = -1) -> Iterator[Tuple[int, Union[dict, str]]]:
+        """
+        Keeps at most `window` transactions of `requests` in flight, sending the next one as soon as
+        a receipt comes in, and yields (index in `requests`, receipt) in the order receipts arrive.
+        `requests` is consumed lazily, so it may be a generator signing transactions on demand.
+        As in process_transaction_bulk, a rejected submission stops sending; its error message
+        is yielded last, once the transactions sent before it are confirmed.
+        """
+        if block_confirm_interval == -1:
+            block_confirm_interval = self._block_confirm_interval
+
+        waiter = ReceiptWaiter(self.batch_provider, block_confirm_interval)
+        # tx hash: (index, transaction type)
+        in_flight: Dict[str, Tuple[int, str]] = {}
+        pending_requests = enumerate(requests)
+        rejected: Optional[Tuple[int, str]] = None
+
+        def submit():
+            nonlocal rejected
+            while rejected is None and len(in_flight) < window:
+                index, request = next(pending_requests, (-1, None))
+                if request is None:
+                    return
+                try:
+                    tx_hash = network.send_transaction(request)
+                except IconServiceBaseException as e:
+                    rejected = (index, e.message)
+                    return
+                in_flight[tx_hash] = (index, get_request_type(request.signed_transaction_dict))
+                waiter.add(tx_hash)
+
+        profiler = get_profiler()
+        submit()
+        receipts = waiter.wait()
+        while in_flight:
+            transaction_type = get_common_type(t for _, t in in_flight.values()) if profiler.enabled else ''
+            with profiler.phase('wait', transaction_type):
+                tx_hash, tx_result = next(receipts)
+            self._observe_receipt(tx_hash, tx_result)
+            index, _ = in_flight.pop(tx_hash)
+            # refill before handing the receipt over, so the node is never idle on the caller
+            submit()
+            yield index, tx_result
+
+        if rejected is not None:
+            yield rejected
+
+    def process_transaction_bulk(self,
+                                 requests: list,
+                                 network: IconService = None,
+                                 block_confirm_interval: int = -1) -> list:
+        if network is None:
+            return super().process_transaction_bulk(requests, network, block_confirm_interval)
+
+        # everything in flight at once: callers expect the whole bulk in the next block, as tbears does
+        results: list = [None] * len(requests)
+        count = 0
+        for index, tx_result in self.process_transaction_stream(requests, network, max(len(requests), 1),
+                                                                block_confirm_interval):
+            results[index] = tx_result
+            count = max(count, index + 1)
+
+        # as in tbears, a rejected submission ends the list
+        return results[:count]
 
     # ================= Tool =================
     def _get_block_height(self) -> int:
@@ -34,18 +257,74 @@ class Base(IconIntegrateTestBase):
         if self.icon_service:
             block = self.icon_service.get_block("latest")
             block_height = block['height']
+            self.term_cache.observe(block_height)
         return block_height
 
     def _make_blocks(self, to: int):
+        self.advance_to(to)
+
+    def _wait_for_block(self, height: int) -> int:
+        deadline = time() + max(10 * self._block_confirm_interval, 10)
+
+        block_height = self._get_block_height()
+        while block_height < height:
+            if time() > deadline:
+                raise TimeoutError(f"Block {height} not confirmed: last block is {block_height}")
+            sleep(BLOCK_POLL_INTERVAL)
+            block_height = self._get_block_height()
+
+        return block_height
+
+    def advance_to(self, height: int) -> int:
         block_height = self._get_block_height()
+        if block_height >= height:
+            return block_height
 
-        while to > block_height:
-            self.process_message_tx(self.icon_service, "test message")
-            block_height += 1
+        # tbears confirms no empty block and packs every pending transaction into the next one,
+        # so exactly one filler is sent per block, as soon as the previous block is seen.
+        # each filler is stamped from a template as it is sent, since the node rejects stale timestamps
+        # and a long advance takes minutes; their receipts are never fetched.
+        while block_height < height:
+            filler = self.create_transfer_icx_tx(self._test1, self._test1.get_address(), 0)
+            try:
+                self.icon_service.send_transaction(filler)
+            except IconServiceBaseException as e:
+                raise RuntimeError(f"Filler for block {block_height + 1} rejected: {e.message}") from e
+            block_height = self._wait_for_block(block_height + 1)
+
+        return block_height
+
+    def advance_to_next_release(self, scheduler: 'UnstakeScheduler') -> List[str]:
+        """
+        Makes blocks up to the next height an unstake of `scheduler` is released at, and no further;
+        the addresses whose unstake is liquid then.
+        """
+        release_height = scheduler.next_release_height()
+        if release_height is None:
+            return []
+        return scheduler.pop_released(self.advance_to(release_height))
+
+    @staticmethod
+    def capture_snapshot():
+        if USE_NODE_STUB:
+            ensure_node_stub(NODE_CONFIG_PATH).node.capture()
+        else:
+            ChainSnapshot(NODE_CONFIG_PATH, SNAPSHOT_DIR).capture()
+
+    @staticmethod
+    def restore_snapshot():
+        if USE_NODE_STUB:
+            ensure_node_stub(NODE_CONFIG_PATH).node.restore()
+        else:
+            snapshot = ChainSnapshot(NODE_CONFIG_PATH, SNAPSHOT_DIR)
+            if snapshot.exists():
+                snapshot.restore()
+
+        # the chain went back to an earlier height
+        Base.term_cache.invalidate()
 
     def _make_blocks_to_next_calculation(self) -> int:
-        iiss_info = self.get_iiss_info()
-        next_calculation = int(iiss_info.get('nextCalculation', 0), 16)
+        next_calculation = IISSInfoView(self.get_iiss_info()).next_calculation
 
         self._make_blocks(to=next_calculation)
 
@@ -53,6 +332,81 @@ class Base(IconIntegrateTestBase):
 
         return next_calculation
 
+    @property
+    def wallet_pool(self) -> 'WalletPool':
+        if Base._wallet_pool is None:
+            # pooled wallets derived from the genesis seed are funded from the start,
+            # so lease_wallets has nothing to top up
+            key_store = KeyStore(KEY_STORE_PATH) if os.path.exists(KEY_STORE_PATH) else None
+            Base._wallet_pool = WalletPool(WALLET_POOL_PATH, key_store=key_store)
+        return Base._wallet_pool
+
+    def lease_wallets(self,
+                      count: int,
+                      min_balance: int = DEFAULT_MIN_BALANCE,
+                      top_up_balance: int = DEFAULT_TOP_UP_BALANCE) -> List['KeyWallet']:
+        """
+        `count` wallets from the pool holding at least `min_balance`, those below topped up to `top_up_balance`.
+        They are released when the test ends, if the test did not release them earlier.
+        """
+        wallets = self.wallet_pool.lease(count)
+        self._leased_wallets.extend(wallets)
+
+        # top up only the wallets which fell below `min_balance`, in one bulk
+        transactions: list = []
+        for wallet, balance in zip(wallets, self.get_balance_batch(wallets)):
+            if balance < min_balance:
+                transaction = self.build_transfer_icx_tx(self._test1, wallet.get_address(), top_up_balance - balance)
+                transactions.append((transaction, self._test1))
+
+        if transactions:
+            signed_transactions = self.sign_transaction_bulk(transactions)
+            for _, tx_result in self.process_transaction_stream(signed_transactions, self.icon_service):
+                self.assertTrue('status' in tx_result)
+                self.assertEqual(1, tx_result['status'])
+
+        return wallets
+
+    @staticmethod
+    def _is_fresh_account(stake: dict, delegation: dict, prep: dict) -> bool:
+        """True for the batch responses of an account holding no stake, unstake, delegation or P-Rep registration"""
+        if 'code' in stake or 'code' in delegation:
+            return False
+        # getPRep of an account which never registered fails, anything else is a registration or an unknown error
+        if 'code' not in prep or not str(prep.get('message')).startswith('P-Rep not found'):
+            return False
+
+        stake, delegation = StakeView(stake), DelegationView(delegation)
+        return stake.stake == 0 and stake.unstake == 0 and not delegation.delegations
+
+    def release_wallets(self, wallets: List['KeyWallet']) -> List['KeyWallet']:
+        """
+        Gives `wallets` back to the pool, except those the node holds stake, an unstake, delegations
+        or a P-Rep registration for: the pool hands wallets out as plain funded accounts,
+        so these are retired instead. The retired wallets.
+        """
+        released_addresses = {wallet.get_address() for wallet in wallets}
+        self._leased_wallets = [wallet for wallet in self._leased_wallets
+                                if wallet.get_address() not in released_addresses]
+
+        fresh: list = []
+        retired: list = []
+        for wallet, stake, delegation, prep in zip(wallets,
+                                                   self.get_stake_batch(wallets),
+                                                   self.get_delegation_batch(wallets),
+                                                   self.get_prep_batch(wallets)):
+            if self._is_fresh_account(stake, delegation, prep):
+                fresh.append(wallet)
+            else:
+                retired.append(wallet)
+
+        self.wallet_pool.release(fresh)
+        return retired
+
+    def sign_transaction_bulk(self,
+                              transactions: Iterable[Tuple['Transaction', 'KeyWallet']]) -> List['SignedTransaction']:
+        return self.bulk_signer.sign(transactions)
+
     @staticmethod
     def create_deploy_score_tx(score_path: str, from_: 'KeyWallet',
                                to: str = SCORE_INSTALL_ADDRESS) -> 'SignedTransaction':
@@ -88,12 +442,31 @@ class Base(IconIntegrateTestBase):
         return signed_transaction
 
     @staticmethod
-    def create_transfer_icx_tx(from_: 'KeyWallet',
-                               to_: str,
-                               value: int,
-                               step_limit: int = DEFAULT_STEP_LIMIT,
-                               nid: int = DEFAULT_NID,
-                               nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'message')
+    def build_message_tx(from_: 'KeyWallet',
+                         message: str,
+                         step_limit: int = DEFAULT_STEP_LIMIT,
+                         nid: int = DEFAULT_NID,
+                         nonce: int = 0) -> 'Transaction':
+        transaction = MessageTransactionBuilder() \
+            .from_(from_.get_address()) \
+            .to(from_.get_address()) \
+            .step_limit(step_limit) \
+            .nid(nid) \
+            .nonce(nonce) \
+            .data(f"0x{message.encode('utf-8').hex()}") \
+            .build()
+
+        return transaction
+
+    @staticmethod
+    @profile_phase('build', 'transfer')
+    def build_transfer_icx_tx(from_: 'KeyWallet',
+                              to_: str,
+                              value: int,
+                              step_limit: int = DEFAULT_STEP_LIMIT,
+                              nid: int = DEFAULT_NID,
+                              nonce: int = 0) -> 'Transaction':
         transaction = TransactionBuilder() \
             .from_(from_.get_address()) \
             .to(to_) \
@@ -103,17 +476,16 @@ class Base(IconIntegrateTestBase):
             .nonce(nonce) \
             .build()
 
-        # Returns the signed transaction object having a signature
-        signed_transaction = SignedTransaction(transaction, from_)
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_register_prep_tx(key_wallet: 'KeyWallet',
-                                reg_data: Dict[str, Union[str, bytes]] = None,
-                                value: int = 0,
-                                step_limit: int = DEFAULT_STEP_LIMIT,
-                                nid: int = DEFAULT_NID,
-                                nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'registerPRep')
+    def build_register_prep_tx(key_wallet: 'KeyWallet',
+                               reg_data: Dict[str, Union[str, bytes]] = None,
+                               value: int = 0,
+                               step_limit: int = DEFAULT_STEP_LIMIT,
+                               nid: int = DEFAULT_NID,
+                               nonce: int = 0) -> 'Transaction':
         if not reg_data:
             reg_data = Base._create_register_prep_params(key_wallet)
 
@@ -128,16 +500,15 @@ class Base(IconIntegrateTestBase):
             params(reg_data). \
             build()
 
-        signed_transaction = SignedTransaction(transaction, key_wallet)
-
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_unregister_prep_tx(key_wallet: 'KeyWallet',
-                                  value: int = 0,
-                                  step_limit: int = DEFAULT_STEP_LIMIT,
-                                  nid: int = DEFAULT_NID,
-                                  nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'unregisterPRep')
+    def build_unregister_prep_tx(key_wallet: 'KeyWallet',
+                                 value: int = 0,
+                                 step_limit: int = DEFAULT_STEP_LIMIT,
+                                 nid: int = DEFAULT_NID,
+                                 nonce: int = 0) -> 'Transaction':
 
         transaction = CallTransactionBuilder(). \
             from_(key_wallet.get_address()). \
@@ -149,18 +520,17 @@ class Base(IconIntegrateTestBase):
             method("unregisterPRep"). \
             build()
 
-        signed_transaction = SignedTransaction(transaction, key_wallet)
-
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_set_prep_tx(key_wallet: 'KeyWallet',
-                           irep: int=None,
-                           set_data: Dict[str, Union[str, bytes]] = None,
-                           value: int = 0,
-                           step_limit: int = DEFAULT_STEP_LIMIT,
-                           nid: int = DEFAULT_NID,
-                           nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'setPRep')
+    def build_set_prep_tx(key_wallet: 'KeyWallet',
+                          irep: int=None,
+                          set_data: Dict[str, Union[str, bytes]] = None,
+                          value: int = 0,
+                          step_limit: int = DEFAULT_STEP_LIMIT,
+                          nid: int = DEFAULT_NID,
+                          nonce: int = 0) -> 'Transaction':
         if set_data is None:
             set_data = {}
         if irep is not None:
@@ -177,17 +547,16 @@ class Base(IconIntegrateTestBase):
             params(set_data). \
             build()
 
-        signed_transaction = SignedTransaction(transaction, key_wallet)
-
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_set_stake_tx(key_wallet: KeyWallet,
-                            stake: int,
-                            value: int = 0,
-                            step_limit: int = DEFAULT_STEP_LIMIT,
-                            nid: int = DEFAULT_NID,
-                            nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'setStake')
+    def build_set_stake_tx(key_wallet: KeyWallet,
+                           stake: int,
+                           value: int = 0,
+                           step_limit: int = DEFAULT_STEP_LIMIT,
+                           nid: int = DEFAULT_NID,
+                           nonce: int = 0) -> 'Transaction':
 
         transaction = CallTransactionBuilder(). \
             from_(key_wallet.get_address()). \
@@ -200,17 +569,16 @@ class Base(IconIntegrateTestBase):
             params({"value": hex(stake)}). \
             build()
 
-        signed_transaction = SignedTransaction(transaction, key_wallet)
-
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_set_delegation_tx(key_wallet: KeyWallet,
-                                 delegations: List[Tuple['KeyWallet', int]],
-                                 value: int = 0,
-                                 step_limit: int = DEFAULT_STEP_LIMIT,
-                                 nid: int = DEFAULT_NID,
-                                 nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'setDelegation')
+    def build_set_delegation_tx(key_wallet: KeyWallet,
+                                delegations: List[Tuple['KeyWallet', int]],
+                                value: int = 0,
+                                step_limit: int = DEFAULT_STEP_LIMIT,
+                                nid: int = DEFAULT_NID,
+                                nonce: int = 0) -> 'Transaction':
         delegations = Base.create_delegation_params(delegations)
 
         transaction = CallTransactionBuilder(). \
@@ -224,16 +592,15 @@ class Base(IconIntegrateTestBase):
             params({"delegations": delegations}). \
             build()
 
-        signed_transaction = SignedTransaction(transaction, key_wallet)
-
-        return signed_transaction
+        return transaction
 
     @staticmethod
-    def create_claim_iscore_tx(key_wallet: 'KeyWallet',
-                               value: int = 0,
-                               step_limit: int = DEFAULT_STEP_LIMIT,
-                               nid: int = DEFAULT_NID,
-                               nonce: int = 0) -> 'SignedTransaction':
+    @profile_phase('build', 'claimIScore')
+    def build_claim_iscore_tx(key_wallet: 'KeyWallet',
+                              value: int = 0,
+                              step_limit: int = DEFAULT_STEP_LIMIT,
+                              nid: int = DEFAULT_NID,
+                              nonce: int = 0) -> 'Transaction':
 
         transaction = CallTransactionBuilder(). \
             from_(key_wallet.get_address()). \
@@ -245,8 +612,112 @@ class Base(IconIntegrateTestBase):
             method("claimIScore"). \
             build()
 
+        return transaction
+
+    @staticmethod
+    def create_transfer_icx_tx(from_: 'KeyWallet',
+                               to_: str,
+                               value: int,
+                               step_limit: int = DEFAULT_STEP_LIMIT,
+                               nid: int = DEFAULT_NID,
+                               nonce: int = 0) -> 'SignedTransaction':
+        # hot path: stamped from a template instead of going through build_transfer_icx_tx
+        template = get_transaction_template(step_limit, nid, nonce)
+        return template.sign(from_, value, to=to_)
+
+    @staticmethod
+    # the nested build is profiled on its own, leaving the signature to this phase
+    @profile_phase('sign', 'registerPRep')
+    def create_register_prep_tx(key_wallet: 'KeyWallet',
+                                reg_data: Dict[str, Union[str, bytes]] = None,
+                                value: int = 0,
+                                step_limit: int = DEFAULT_STEP_LIMIT,
+                                nid: int = DEFAULT_NID,
+                                nonce: int = 0) -> 'SignedTransaction':
+        transaction = Base.build_register_prep_tx(key_wallet,
+                                                  reg_data=reg_data,
+                                                  value=value,
+                                                  step_limit=step_limit,
+                                                  nid=nid,
+                                                  nonce=nonce)
+
+        # Returns the signed transaction object having a signature
         signed_transaction = SignedTransaction(transaction, key_wallet)
+        return signed_transaction
+
+    @staticmethod
+    @profile_phase('sign', 'unregisterPRep')
+    def create_unregister_prep_tx(key_wallet: 'KeyWallet',
+                                  value: int = 0,
+                                  step_limit: int = DEFAULT_STEP_LIMIT,
+                                  nid: int = DEFAULT_NID,
+                                  nonce: int = 0) -> 'SignedTransaction':
+        transaction = Base.build_unregister_prep_tx(key_wallet,
+                                                    value=value,
+                                                    step_limit=step_limit,
+                                                    nid=nid,
+                                                    nonce=nonce)
+
+        # Returns the signed transaction object having a signature
+        signed_transaction = SignedTransaction(transaction, key_wallet)
+        return signed_transaction
+
+    @staticmethod
+    @profile_phase('sign', 'setPRep')
+    def create_set_prep_tx(key_wallet: 'KeyWallet',
+                           irep: int=None,
+                           set_data: Dict[str, Union[str, bytes]] = None,
+                           value: int = 0,
+                           step_limit: int = DEFAULT_STEP_LIMIT,
+                           nid: int = DEFAULT_NID,
+                           nonce: int = 0) -> 'SignedTransaction':
+        transaction = Base.build_set_prep_tx(key_wallet,
+                                             irep=irep,
+                                             set_data=set_data,
+                                             value=value,
+                                             step_limit=step_limit,
+                                             nid=nid,
+                                             nonce=nonce)
+
+        # Returns the signed transaction object having a signature
+        signed_transaction = SignedTransaction(transaction, key_wallet)
+        return signed_transaction
+
+    @staticmethod
+    def create_set_stake_tx(key_wallet: KeyWallet,
+                            stake: int,
+                            value: int = 0,
+                            step_limit: int = DEFAULT_STEP_LIMIT,
+                            nid: int = DEFAULT_NID,
+                            nonce: int = 0) -> 'SignedTransaction':
+        template = get_transaction_template(step_limit, nid, nonce, SYSTEM_ADDRESS, "setStake")
+        return template.sign(key_wallet, value, {"value": hex(stake)})
+
+    @staticmethod
+    def create_set_delegation_tx(key_wallet: KeyWallet,
+                                 delegations: List[Tuple['KeyWallet', int]],
+                                 value: int = 0,
+                                 step_limit: int = DEFAULT_STEP_LIMIT,
+                                 nid: int = DEFAULT_NID,
+                                 nonce: int = 0) -> 'SignedTransaction':
+        template = get_transaction_template(step_limit, nid, nonce, SYSTEM_ADDRESS, "setDelegation")
+        return template.sign(key_wallet, value, {"delegations": Base.create_delegation_params(delegations)})
 
+    @staticmethod
+    @profile_phase('sign', 'claimIScore')
+    def create_claim_iscore_tx(key_wallet: 'KeyWallet',
+                               value: int = 0,
+                               step_limit: int = DEFAULT_STEP_LIMIT,
+                               nid: int = DEFAULT_NID,
+                               nonce: int = 0) -> 'SignedTransaction':
+        transaction = Base.build_claim_iscore_tx(key_wallet,
+                                                 value=value,
+                                                 step_limit=step_limit,
+                                                 nid=nid,
+                                                 nonce=nonce)
+
+        # Returns the signed transaction object having a signature
+        signed_transaction = SignedTransaction(transaction, key_wallet)
         return signed_transaction
 
     def get_prep_list(self,
@@ -267,22 +738,10 @@ class Base(IconIntegrateTestBase):
         return response
 
     def get_main_prep_list(self) -> dict:
-        call = CallBuilder() \
-            .from_(self._test1.get_address()) \
-            .to(SYSTEM_ADDRESS) \
-            .method("getMainPRepList") \
-            .build()
-        response = self.process_call(call, self.icon_service)
-        return response
+        return self._process_term_call("getMainPRepList")
 
     def get_sub_prep_list(self) -> dict:
-        call = CallBuilder() \
-            .from_(self._test1.get_address()) \
-            .to(SYSTEM_ADDRESS) \
-            .method("getSubPRepList") \
-            .build()
-        response = self.process_call(call, self.icon_service)
-        return response
+        return self._process_term_call("getSubPRepList")
 
     def get_prep(self,
                  key_wallet: 'KeyWallet') -> dict:
@@ -334,16 +793,31 @@ class Base(IconIntegrateTestBase):
         return response
 
     def get_iiss_info(self) -> dict:
+        return self._process_term_call("getIISSInfo")
+
+    def _process_term_call(self, method: str) -> dict:
+        response = self.term_cache.get(method)
+        if response is not None:
+            return response
+
         call = CallBuilder() \
             .from_(self._test1.get_address()) \
             .to(SYSTEM_ADDRESS) \
-            .method("getIISSInfo") \
+            .method(method) \
             .build()
         response = self.process_call(call, self.icon_service)
+        # error responses are not cached
+        if 'code' in response:
+            return response
+
+        iiss_info = response if method == "getIISSInfo" else self.get_iiss_info()
+        if 'nextCalculation' in iiss_info:
+            self.term_cache.put(method, response, TermCache.get_valid_until(iiss_info))
         return response
 
     @staticmethod
     def _create_register_prep_params(key_wallet: 'KeyWallet') -> Dict[str, Union[str, bytes]]:
+        # pooled wallets are StoredKeyWallets, which read the address and public key from the key store
         name = f"node{key_wallet.get_address()[2:7]}"
 
         return {
@@ -360,3 +834,193 @@ class Base(IconIntegrateTestBase):
         return [{"address": key_wallet.get_address(), "value": hex(value)}
                 for (key_wallet, value) in params
                 if value > 0]
+
+    # ================= Async =================
+    def _make_system_call(self, method: str, params: Optional[dict] = None) -> 'Call':
+        return CallBuilder() \
+            .from_(self._test1.get_address()) \
+            .to(SYSTEM_ADDRESS) \
+            .method(method) \
+            .params(params) \
+            .build()
+
+    async def async_process_call(self, call: 'Call'):
+        try:
+            response = await self.async_icon_service.call(call)
+        except IconServiceBaseException as e:
+            response = e.message
+
+        return response
+
+    async def async_get_prep_list(self,
+                                  start_index: Optional[int] = None,
+                                  end_index: Optional[int] = None) -> dict:
+        params = {}
+        if start_index is not None:
+            params['startRanking'] = hex(start_index)
+        if end_index is not None:
+            params['endRanking'] = hex(end_index)
+        call = self._make_system_call("getPRepList", params)
+        return await self.async_process_call(call)
+
+    def iter_preps(self,
+                   page_size: int = PREP_PAGE_SIZE,
+                   prefetch: int = PREP_PAGE_PREFETCH) -> Iterator['PRepSummaryView']:
+        """
+        Streams the whole P-Rep ranking, `page_size` entries per getPRepList call,
+        with the next `prefetch` pages requested concurrently while the current one is consumed.
+        Pages are fetched at different heights, so a ranking that changes meanwhile may repeat or skip entries.
+        """
+        def fetch(start: int) -> 'asyncio.Task':
+            return self._loop.create_task(self.async_get_prep_list(start, start + page_size - 1))
+
+        pages = deque(fetch(1 + i * page_size) for i in range(prefetch))
+        next_start = 1 + prefetch * page_size
+        try:
+            while pages:
+                response = self.run_async(pages.popleft())
+                # a page past the last ranking is an error response
+                preps = PRepListView(response).preps if 'preps' in response else []
+                yield from preps
+                if len(preps) < page_size:
+                    break
+
+                pages.append(fetch(next_start))
+                next_start += page_size
+        finally:
+            for page in pages:
+                page.cancel()
+            if pages and not self._loop.is_closed():
+                self.run_async(asyncio.wait(pages))
+
+    async def async_get_prep(self,
+                             key_wallet: 'KeyWallet') -> dict:
+        call = self._make_system_call("getPRep", {"address": key_wallet.get_address()})
+        return await self.async_process_call(call)
+
+    async def async_get_stake(self,
+                              key_wallet: 'KeyWallet') -> dict:
+        call = self._make_system_call("getStake", {"address": key_wallet.get_address()})
+        return await self.async_process_call(call)
+
+    async def async_get_delegation(self,
+                                   key_wallet: 'KeyWallet') -> dict:
+        call = self._make_system_call("getDelegation", {"address": key_wallet.get_address()})
+        return await self.async_process_call(call)
+
+    async def async_get_balance(self,
+                                key_wallet: 'KeyWallet') -> int:
+        return await self.async_icon_service.get_balance(key_wallet.get_address())
+
+    async def async_query_iscore(self,
+                                 key_wallet: 'KeyWallet') -> dict:
+        call = self._make_system_call("queryIScore", {"address": key_wallet.get_address()})
+        return await self.async_process_call(call)
+
+    async def async_get_iiss_info(self) -> dict:
+        call = self._make_system_call("getIISSInfo")
+        return await self.async_process_call(call)
+
+    # ================= Batch =================
+    def process_call_batch(self, calls: List['Call']) -> list:
+        return self.batch_provider.make_batch_request([('icx_call', convert_call_to_params(call)) for call in calls])
+
+    def _process_system_call_batch(self, method: str, key_wallets: List['KeyWallet']) -> list:
+        calls = [self._make_system_call(method, {"address": key_wallet.get_address()}) for key_wallet in key_wallets]
+        return self.process_call_batch(calls)
+
+    def get_prep_batch(self,
+                       key_wallets: List['KeyWallet']) -> list:
+        return self._process_system_call_batch("getPRep", key_wallets)
+
+    def get_stake_batch(self,
+                        key_wallets: List['KeyWallet']) -> list:
+        return self._process_system_call_batch("getStake", key_wallets)
+
+    def get_delegation_batch(self,
+                             key_wallets: List['KeyWallet']) -> list:
+        return self._process_system_call_batch("getDelegation", key_wallets)
+
+    def query_iscore_batch(self,
+                           key_wallets: List['KeyWallet']) -> list:
+        return self._process_system_call_batch("queryIScore", key_wallets)
+
+    def assert_ledger(self,
+                      ledger: 'ShadowLedger',
+                      key_wallets: List['KeyWallet'],
+                      sample_size: Optional[int] = None,
+                      delegation: bool = False):
+        """
+        Checks the balance and stake (and delegation) the node holds for `key_wallets`,
+        or `sample_size` of them picked at random, against `ledger`, in one batch request each.
+        """
+        if sample_size is not None and sample_size < len(key_wallets):
+            key_wallets = random.sample(key_wallets, sample_size)
+
+        block_height = self._get_block_height()
+        balances = self.get_balance_batch(key_wallets)
+        stakes = self.get_stake_batch(key_wallets)
+        for key_wallet, balance, stake in zip(key_wallets, balances, stakes):
+            address = key_wallet.get_address()
+            self.assertEqual(ledger.expected_balance(address, block_height), balance)
+            self.assertEqual(ledger.expected_stake(address, block_height), stake)
+
+        if delegation:
+            for key_wallet, response in zip(key_wallets, self.get_delegation_batch(key_wallets)):
+                self.assertEqual(ledger.expected_delegation(key_wallet.get_address()), response)
+
+    def get_balance_batch(self,
+                          key_wallets: List['KeyWallet']) -> List[int]:
+        """Balances of `key_wallets`; an error response raises JSONRPCException, as get_balance does"""
+        responses = self.batch_provider.make_batch_request(
+            [('icx_getBalance', {"address": key_wallet.get_address()}) for key_wallet in key_wallets])
+
+        for response in responses:
+            if not isinstance(response, str):
+                raise JSONRPCException(response)
+        return [int(response, 16) for response in responses]
+
+    # ================= Scenario =================
+    def _process_transactions_ok(self, requests: Iterable['SignedTransaction'], msg: Optional[str] = None):
+        for _, tx_result in self.process_transaction_stream(requests, self.icon_service):
+            self.assertTrue('status' in tx_result, f"{msg}: {tx_result}" if msg else tx_result)
+            self.assertEqual(1, tx_result['status'], msg)
+
+    def register_preps(self, preps: List['KeyWallet'], balance: int = ICX_FACTOR, msg: Optional[str] = None):
+        """Funds every P-Rep of `preps` with `balance` and registers it, each step in one stream"""
+        self._process_transactions_ok(
+            (self.create_transfer_icx_tx(self._test1, prep.get_address(), balance) for prep in preps), msg)
+        self._process_transactions_ok((self.create_register_prep_tx(prep) for prep in preps), msg)
+
+    def run_delegation_scenario(self,
+                                scenario: 'DelegationScenario',
+                                chunk_size: int = SCENARIO_CHUNK_SIZE,
+                                fee_allowance: int = ICX_FACTOR,
+                                register_preps: bool = False):
+        """
+        Funds, stakes and delegates every delegator of `scenario`, `chunk_size` delegators at a time,
+        checking each chunk with batched getDelegation queries and the P-Reps' delegated amounts at the end.
+        With `register_preps`, the P-Reps of `scenario` are funded and registered first.
+        Only one chunk is held in memory. Failures name the scenario seed, which reproduces the delegators.
+        """
+        msg = f"delegation scenario seed {scenario.seed!r}"
+        if register_preps:
+            self.register_preps(scenario.preps, fee_allowance, msg)
+
+        for chunk in scenario.chunks(chunk_size):
+            self._process_transactions_ok(
+                (self.create_transfer_icx_tx(self._test1, delegator.get_address(), scenario.stake + fee_allowance)
+                 for _, delegator, _ in chunk), msg)
+            self._process_transactions_ok(
+                (self.create_set_stake_tx(delegator, scenario.stake) for _, delegator, _ in chunk), msg)
+            self._process_transactions_ok(
+                (self.create_set_delegation_tx(delegator, delegations) for _, delegator, delegations in chunk), msg)
+
+            responses = self.get_delegation_batch([delegator for _, delegator, _ in chunk])
+            for (index, _, _), response in zip(chunk, responses):
+                self.assertEqual(scenario.expected_delegation(index), response, f"{msg}, delegator {index}")
+
+        responses = PRepView.from_responses(self.get_prep_batch(scenario.preps))
+        for prep, response in zip(scenario.preps, responses):
+            self.assertIsInstance(response, PRepView, f"{msg}, P-Rep {prep.get_address()}: {response}")
+        self.assertEqual(scenario.expected_prep_delegated(), [response.delegated for response in responses], msg)
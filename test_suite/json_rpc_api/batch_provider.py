@@ -0,0 +1,167 @@
+import json
+from json.decoder import JSONDecodeError
+from time import perf_counter
+from typing import List, Tuple, Optional, Union
+
+import requests
+from iconsdk.builder.call_builder import Call
+
+from .metrics import get_metrics, get_score_method
+from .profiler import get_common_type, get_profiler
+from .session_pool import get_session_pool
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_TIMEOUT = 10
+# times a batch is sent before its requests go one by one
+BATCH_ATTEMPTS = 2
+INVALID_REQUEST = -32600
+
+
+def convert_call_to_params(call: 'Call') -> dict:
+    params = {
+        "to": call.to,
+        "dataType": "call",
+        "data": {
+            "method": call.method
+        }
+    }
+    if call.from_ is not None:
+        params["from"] = call.from_
+    if isinstance(call.params, dict):
+        params["data"]["params"] = call.params
+
+    return params
+
+
+class BatchHTTPProvider:
+    """
+    Sends (method, params) pairs as JSON-RPC 2.0 batch arrays of at most `batch_size` requests.
+    Responses are matched back to requests by id and returned in request order:
+    the `result` for a successful request, the `error` object otherwise (as `process_call` does).
+    If the node rejects batches outright (a single response object, or an Invalid Request error
+    for the array), the provider stops batching and sends requests one by one from then on.
+    A malformed or partial answer is taken as transient: the batch is sent again, and if that fails too,
+    only its requests go one by one.
+    """
+
+    def __init__(self,
+                 full_path_url: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self._full_path_url = full_path_url
+        self._batch_size = batch_size
+        self._timeout = timeout
+        self._batch_supported = True
+
+    def __str__(self):
+        return f"Batch RPC connection {self._full_path_url}"
+
+    @property
+    def batch_supported(self) -> bool:
+        return self._batch_supported
+
+    def _post(self, data: Union[dict, list]) -> Optional[Union[dict, list]]:
+        profiler = get_profiler()
+        request_type = ''
+        if profiler.enabled:
+            request_type = get_common_type(get_score_method(rpc_dict['method'], rpc_dict.get('params'))
+                                           or rpc_dict['method']
+                                           for rpc_dict in (data if isinstance(data, list) else [data]))
+
+        with profiler.phase('query', request_type):
+            with profiler.phase('serialize', request_type):
+                body = json.dumps(data)
+            start = perf_counter()
+            try:
+                response = get_session_pool().session.post(url=self._full_path_url,
+                                                           data=body,
+                                                           headers={'Content-Type': 'application/json'},
+                                                           timeout=self._timeout)
+            except requests.RequestException:
+                self._observe(data, perf_counter() - start, None)
+                raise
+
+        try:
+            content = json.loads(response.content)
+        except JSONDecodeError:
+            content = None
+
+        self._observe(data, perf_counter() - start, content)
+        return content
+
+    @staticmethod
+    def _observe(data: Union[dict, list], seconds: float, content: Optional[Union[dict, list]]):
+        metrics = get_metrics()
+        if isinstance(data, dict):
+            metrics.observe('http', data, seconds, content if isinstance(content, dict) else None)
+            return
+
+        # every request of a batch is charged the latency of the whole batch
+        responses = {}
+        if isinstance(content, list):
+            responses = {response.get('id'): response for response in content if isinstance(response, dict)}
+        for rpc_dict in data:
+            metrics.observe('batch', rpc_dict, seconds, responses.get(rpc_dict['id']))
+
+    @staticmethod
+    def _unwrap(response: Optional[dict]) -> Union[str, list, dict]:
+        if response is None:
+            return {"code": -32700, "message": "Invalid JSON response"}
+        if 'result' in response:
+            return response['result']
+        return response.get('error')
+
+    @staticmethod
+    def _is_rejection(content: Optional[Union[dict, list]]) -> bool:
+        """True if `content`, the answer to a well-formed batch, says the node takes no batches"""
+        if isinstance(content, dict):
+            return True
+        if not isinstance(content, list):
+            return False
+        return any(isinstance(response, dict) and response.get('id') is None
+                   and isinstance(response.get('error'), dict) and response['error'].get('code') == INVALID_REQUEST
+                   for response in content)
+
+    def make_request(self, method: str, params: Optional[dict] = None) -> Union[str, list, dict]:
+        rpc_dict = {
+            'jsonrpc': '2.0',
+            'method': method,
+            'id': 0
+        }
+        if params:
+            rpc_dict['params'] = params
+
+        return self._unwrap(self._post(rpc_dict))
+
+    def make_batch_request(self, calls: List[Tuple[str, Optional[dict]]]) -> list:
+        results: list = []
+        for start in range(0, len(calls), self._batch_size):
+            results.extend(self._make_chunk_request(calls[start:start + self._batch_size]))
+
+        return results
+
+    def _make_chunk_request(self, calls: List[Tuple[str, Optional[dict]]]) -> list:
+        if self._batch_supported:
+            rpc_list = []
+            for request_id, (method, params) in enumerate(calls):
+                rpc_dict = {
+                    'jsonrpc': '2.0',
+                    'method': method,
+                    'id': request_id
+                }
+                if params:
+                    rpc_dict['params'] = params
+                rpc_list.append(rpc_dict)
+
+            for _ in range(BATCH_ATTEMPTS):
+                content = self._post(rpc_list)
+                if isinstance(content, list):
+                    responses = {response.get('id'): response for response in content if isinstance(response, dict)}
+                    if len(responses) == len(calls) and all(i in responses for i in range(len(calls))):
+                        return [self._unwrap(responses[i]) for i in range(len(calls))]
+
+                if self._is_rejection(content):
+                    self._batch_supported = False
+                    break
+
+        return [self.make_request(method, params) for method, params in calls]
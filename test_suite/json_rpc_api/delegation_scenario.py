@@ -0,0 +1,99 @@
+import os
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from iconsdk.wallet.wallet import KeyWallet
+
+from .wallet_pool import derive_private_key
+
+# setDelegation accepts at most this many entries per account
+MAX_DELEGATIONS = 10
+DEFAULT_DELEGATION_COUNTS = tuple(range(MAX_DELEGATIONS + 1))
+
+
+class DelegationScenario:
+    """
+    `delegator_count` delegators, each staking `stake` and delegating to `preps`.
+    Delegator i makes `delegation_counts[i % len(delegation_counts)]` delegations of
+    `stake // MAX_DELEGATIONS` each, to consecutive P-Reps starting at `preps[i % len(preps)]`.
+    Wallets, delegations and expected responses are all derived from the index on demand,
+    so only the P-Reps are kept in memory, whatever the number of delegators.
+    """
+
+    def __init__(self,
+                 preps: Sequence['KeyWallet'],
+                 delegator_count: int,
+                 stake: int,
+                 delegation_counts: Sequence[int] = DEFAULT_DELEGATION_COUNTS,
+                 seed: Optional[str] = None):
+        if not delegation_counts or not all(0 <= count <= min(MAX_DELEGATIONS, len(preps))
+                                            for count in delegation_counts):
+            raise ValueError(f"Delegation counts must be between 0 and {min(MAX_DELEGATIONS, len(preps))}")
+        if stake < MAX_DELEGATIONS:
+            raise ValueError(f"Stake too small to delegate: {stake}")
+
+        self._preps = list(preps)
+        self._delegator_count = delegator_count
+        self._stake = stake
+        self._delegation_counts = tuple(delegation_counts)
+        # a fresh seed per scenario, so no delegator carries state from an earlier run;
+        # failures report it, and passing it back rebuilds the same delegators
+        self._seed = seed if seed is not None else f"delegation-scenario-{os.urandom(8).hex()}"
+
+    def __len__(self):
+        return self._delegator_count
+
+    @property
+    def preps(self) -> List['KeyWallet']:
+        return self._preps
+
+    @property
+    def seed(self) -> str:
+        return self._seed
+
+    @property
+    def stake(self) -> int:
+        return self._stake
+
+    @property
+    def delegation_value(self) -> int:
+        return self._stake // MAX_DELEGATIONS
+
+    def delegator(self, index: int) -> 'KeyWallet':
+        return KeyWallet.load(derive_private_key(self._seed, index))
+
+    def delegations(self, index: int) -> List[Tuple['KeyWallet', int]]:
+        count = self._delegation_counts[index % len(self._delegation_counts)]
+        return [(self._preps[(index + i) % len(self._preps)], self.delegation_value) for i in range(count)]
+
+    def expected_delegation(self, index: int) -> dict:
+        """getDelegation response of delegator `index` once the scenario ran"""
+        delegations = self.delegations(index)
+        total_delegated = sum(value for _, value in delegations)
+        return {
+            "delegations": [{"address": prep.get_address(), "value": hex(value)} for prep, value in delegations],
+            "totalDelegated": hex(total_delegated),
+            "votingPower": hex(self._stake - total_delegated)
+        }
+
+    def expected_prep_delegated(self) -> List[int]:
+        """delegated amount of each P-Rep once the scenario ran, in `preps` order"""
+        delegated = [0] * len(self._preps)
+        prep_count = len(self._preps)
+        for index in range(self._delegator_count):
+            count = self._delegation_counts[index % len(self._delegation_counts)]
+            for i in range(count):
+                delegated[(index + i) % prep_count] += self.delegation_value
+        return delegated
+
+    def __iter__(self) -> Iterator[Tuple[int, 'KeyWallet', List[Tuple['KeyWallet', int]]]]:
+        """(index, delegator, delegations), one delegator at a time"""
+        for index in range(self._delegator_count):
+            yield index, self.delegator(index), self.delegations(index)
+
+    def chunks(self, chunk_size: int) -> Iterator[List[Tuple[int, 'KeyWallet', List[Tuple['KeyWallet', int]]]]]:
+        delegators = iter(self)
+        chunk = list(islice(delegators, chunk_size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(delegators, chunk_size))
@@ -0,0 +1,87 @@
+from typing import Sequence, Union
+
+import numpy as np
+
+min_rrep = 200
+min_delegation = 788400
+block_per_year = 15768000
+gv_divider = 10000
+iscore_multiplier = 1000
+reward_divider = block_per_year * gv_divider / iscore_multiplier
+
+INT64_MAX = np.iinfo(np.int64).max
+INT64_MIN = np.iinfo(np.int64).min
+
+ArrayLike = Union[int, Sequence[int], 'np.ndarray']
+
+
+def _to_object_array(values: 'ArrayLike') -> 'np.ndarray':
+    # delegations in loop easily exceed int64, so inputs start out as python ints
+    return np.array(values, dtype=object)
+
+
+def calculate_iscore(delegations: 'ArrayLike', rreps: 'ArrayLike', blocks: 'ArrayLike') -> 'np.ndarray':
+    """
+    iscore = delegation_amount * period * rrep / reward_divider, element-wise with broadcasting.
+    Matches `int(delegation * rrep * blocks / reward_divider)` bit for bit:
+    products that fit in int64 take the vectorized float path, larger ones fall back to python ints.
+    """
+    delegations, rreps, blocks = np.broadcast_arrays(_to_object_array(delegations),
+                                                     _to_object_array(rreps),
+                                                     _to_object_array(blocks))
+    blocks = _to_object_array(np.maximum(blocks, 0))
+    eligible = np.asarray((delegations >= min_delegation) & (rreps >= min_rrep), dtype=bool)
+
+    if delegations.size == 0:
+        return np.zeros(delegations.shape, dtype=np.int64)
+
+    # every factor has to fit on its own too: a zero factor makes the product bound 0
+    maxima = [int(np.max(np.abs(values))) for values in (delegations, rreps, blocks)]
+    if max(maxima) <= INT64_MAX and maxima[0] * maxima[1] * maxima[2] <= INT64_MAX:
+        products = delegations.astype(np.int64) * rreps.astype(np.int64) * blocks.astype(np.int64)
+        iscore = (products.astype(np.float64) / reward_divider).astype(np.int64)
+        return np.where(eligible, iscore, 0)
+
+    products = delegations * rreps * blocks
+    iscore = _to_object_array(np.frompyfunc(lambda product: int(product / reward_divider), 1, 1)(products))
+    return np.where(eligible, iscore, 0)
+
+
+def calculate_period_iscore(delegations: 'ArrayLike',
+                            starts: 'ArrayLike',
+                            calculation_heights: 'ArrayLike',
+                            rreps: 'ArrayLike') -> 'np.ndarray':
+    """
+    I-Score of each delegator for each calculation period, shaped (delegators, periods).
+    Period k ends at calculation_heights[k] and is rewarded with rreps[k], the rrep sampled there;
+    it starts at the previous calculation or at the delegator's delegation block, whichever is later.
+    """
+    calculation_heights = np.asarray(calculation_heights, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64).reshape(-1, 1)
+
+    period_starts = np.concatenate(([INT64_MIN], calculation_heights[:-1]))
+    blocks = calculation_heights - np.maximum(starts, period_starts)
+
+    return calculate_iscore(_to_object_array(delegations).reshape(-1, 1),
+                            _to_object_array(rreps).reshape(1, -1),
+                            blocks)
+
+
+def calculate_claimable_iscore(period_iscore: 'np.ndarray', claimed_after: int = -1) -> 'np.ndarray':
+    """
+    I-Score queryIScore shows after each calculation, shaped like `period_iscore`.
+    A period is visible from the calculation after the one that closes it;
+    `claimed_after` is the index of the calculation after which claimIScore was sent.
+    """
+    visible = np.zeros(period_iscore.shape, dtype=period_iscore.dtype)
+    visible[:, 1:] = np.cumsum(period_iscore[:, :-1], axis=1)
+
+    if 0 <= claimed_after < visible.shape[1] - 1:
+        claimed = visible[:, claimed_after] - claim_remainder(visible[:, claimed_after])
+        visible[:, claimed_after + 1:] -= claimed.reshape(-1, 1)
+    return visible
+
+
+def claim_remainder(iscore: 'ArrayLike') -> 'ArrayLike':
+    """I-Score left after claimIScore, which only pays out whole multiples of 1000."""
+    return iscore % iscore_multiplier
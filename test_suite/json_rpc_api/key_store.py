@@ -0,0 +1,152 @@
+import mmap
+import os
+import struct
+from hashlib import sha3_256
+from typing import Iterable, Optional
+
+from iconsdk.wallet.wallet import KeyWallet
+
+from .wallet_pool import derive_private_key
+
+DEFAULT_KEY_STORE_PATH = os.path.abspath('.genesis_keys.bin')
+
+MAGIC = b'ICXKEYS1'
+# magic, record count, index of the first record, seed length; the seed follows
+HEADER = struct.Struct('>8sIIH')
+PRIVATE_KEY_SIZE = 32
+PUBLIC_KEY_SIZE = 65
+ADDRESS_SIZE = 20
+RECORD_SIZE = PRIVATE_KEY_SIZE + PUBLIC_KEY_SIZE + ADDRESS_SIZE
+
+
+def derive_key_record(seed: str, index: int) -> bytes:
+    """private key | uncompressed public key | address body of the wallet derived at `index`"""
+    private_key = derive_private_key(seed, index)
+    public_key = KeyWallet.load(private_key).bytes_public_key
+    return private_key + public_key + sha3_256(public_key[1:]).digest()[-20:]
+
+
+def write_key_store(path: str, seed: str, start: int, count: int, records: Iterable[bytes]):
+    seed_bytes = seed.encode()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, start, len(seed_bytes)))
+        f.write(seed_bytes)
+        written = 0
+        for record in records:
+            f.write(record)
+            written += 1
+
+    if written != count:
+        os.remove(tmp_path)
+        raise ValueError(f"Expected {count} key records, got {written}")
+    os.replace(tmp_path, path)
+
+
+class StoredKeyWallet:
+    """
+    Wallet whose address and keys are read from a KeyStore, usable wherever a KeyWallet is
+    (`get_address`, `get_private_key`, `sign`, ...). It wraps the key store and an index rather than
+    subclassing KeyWallet, which has no __slots__, so an instance costs a few slots and nothing more
+    until the secp256k1 key object is built on the first `sign`.
+    """
+    __slots__ = ('_key_store', '_index', '_wallet')
+
+    def __init__(self, key_store: 'KeyStore', index: int):
+        self._key_store = key_store
+        self._index = index
+        self._wallet: Optional['KeyWallet'] = None
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def bytes_public_key(self) -> bytes:
+        return self._key_store.public_key(self._index)
+
+    @property
+    def public_key(self) -> bytes:
+        return self._key_store.public_key(self._index)
+
+    def get_address(self) -> str:
+        return self._key_store.address(self._index)
+
+    def get_private_key(self) -> str:
+        return self._key_store.private_key(self._index).hex()
+
+    def _materialize(self) -> 'KeyWallet':
+        if self._wallet is None:
+            self._wallet = KeyWallet.load(self._key_store.private_key(self._index))
+        return self._wallet
+
+    def sign(self, data: bytes) -> bytes:
+        return self._materialize().sign(data)
+
+    def __getattr__(self, name: str):
+        # anything else KeyWallet offers (store, ...) goes to the real wallet
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._materialize(), name)
+
+
+class KeyStore:
+    """
+    Keys of the wallets `derive_private_key(seed, index)` gives for `start <= index < start + count`,
+    as written by the genesis generator. The file is memory-mapped, so holding even
+    hundreds of thousands of accounts costs no memory until their records are read,
+    and wallets are StoredKeyWallets built on access.
+    """
+
+    def __init__(self, path: str = DEFAULT_KEY_STORE_PATH):
+        self._file = open(path, 'rb')
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self._start, seed_length = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a key store: {path}")
+        self._seed = self._data[HEADER.size:HEADER.size + seed_length].decode()
+        self._records_offset = HEADER.size + seed_length
+        if len(self._data) < self._records_offset + self._count * RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Truncated key store: {path}")
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, index: int) -> bool:
+        return self._start <= index < self._start + self._count
+
+    @property
+    def seed(self) -> str:
+        return self._seed
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    def _offset(self, index: int) -> int:
+        if index not in self:
+            raise IndexError(f"Key index out of range: {index}")
+        return self._records_offset + (index - self._start) * RECORD_SIZE
+
+    def private_key(self, index: int) -> bytes:
+        offset = self._offset(index)
+        return self._data[offset:offset + PRIVATE_KEY_SIZE]
+
+    def public_key(self, index: int) -> bytes:
+        offset = self._offset(index) + PRIVATE_KEY_SIZE
+        return self._data[offset:offset + PUBLIC_KEY_SIZE]
+
+    def address(self, index: int) -> str:
+        offset = self._offset(index) + PRIVATE_KEY_SIZE + PUBLIC_KEY_SIZE
+        return f"hx{self._data[offset:offset + ADDRESS_SIZE].hex()}"
+
+    def wallet(self, index: int) -> 'StoredKeyWallet':
+        self._offset(index)
+        return StoredKeyWallet(self, index)
@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+# upper bounds in seconds; every histogram also has a +Inf bucket
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JSON_FILE_NAME = 'metrics.json'
+PROMETHEUS_FILE_NAME = 'metrics.prom'
+PROMETHEUS_PREFIX = 'icon_test'
+# sent transactions remembered until their receipt is seen; the oldest are forgotten past this
+MAX_TRACKED_TRANSACTIONS = 100_000
+# goloop's codes for a transaction not in a block yet; iconrpcserver only says so in the message
+PENDING_ERROR_CODES = (-31002, -31003)
+PENDING_MESSAGES = ('pending', 'executing')
+
+
+def get_score_method(rpc_method: str, params: Optional[dict]) -> str:
+    """
+    The SCORE method an icx_call or icx_sendTransaction request invokes;
+    the data type (or 'transfer') for transactions calling none, '' for every other request.
+    """
+    if rpc_method not in ('icx_call', 'icx_sendTransaction') or not isinstance(params, dict):
+        return ''
+
+    data_type = params.get('dataType')
+    if data_type == 'call':
+        data = params.get('data')
+        return data.get('method', '') if isinstance(data, dict) else ''
+    return data_type or 'transfer'
+
+
+def is_pending(response: Optional[dict]) -> bool:
+    """True if `response` is the error the node answers a receipt poll with before the transaction is in a block"""
+    if not isinstance(response, dict) or not isinstance(response.get('error'), dict):
+        return False
+
+    error = response['error']
+    if error.get('code') in PENDING_ERROR_CODES:
+        return True
+    message = str(error.get('message', '')).lower()
+    return any(word in message for word in PENDING_MESSAGES)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> list:
+        """(upper bound, observations at or below it) pairs, as Prometheus buckets are"""
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": {_format_bound(bound): count for bound, count in self.cumulative()}
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class Metrics:
+    """
+    Latency histograms of every JSON-RPC request the providers send, keyed by
+    (transport, JSON-RPC method, SCORE method), with the requests which failed,
+    and the receipts which came back with status 0, by the SCORE method of their transaction.
+    A failed request is one with an error response or none at all, except receipt polls
+    of transactions not yet in a block, which are neither failed nor answered.
+    Receipts are counted as icx_getTransactionResult responses of transactions sent by this process,
+    whichever path polled them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        # (transport, rpc method, score method): histogram
+        self._latencies: Dict[Tuple[str, str, str], 'Histogram'] = {}
+        self._errors: Dict[Tuple[str, str, str], int] = {}
+        self._failed_receipts: Dict[str, int] = {}
+        self._receipts: Dict[str, int] = {}
+        # tx hash: score method, until the receipt is seen
+        self._transactions: Dict[str, str] = {}
+
+    @property
+    def empty(self) -> bool:
+        return not self._latencies
+
+    def observe(self, transport: str, request: dict, seconds: float, response: Optional[dict]):
+        """Records one request; `response` is the decoded JSON-RPC response, None if there was none"""
+        rpc_method = request.get('method', '')
+        score_method = get_score_method(rpc_method, request.get('params'))
+        key = (transport, rpc_method, score_method)
+        answered = isinstance(response, dict) and 'result' in response
+
+        with self._lock:
+            histogram = self._latencies.get(key)
+            if histogram is None:
+                histogram = self._latencies[key] = Histogram(self._buckets)
+            histogram.observe(seconds)
+            if not answered:
+                if rpc_method != 'icx_getTransactionResult' or not is_pending(response):
+                    self._errors[key] = self._errors.get(key, 0) + 1
+            elif rpc_method == 'icx_sendTransaction':
+                self._track_transaction(response['result'], score_method)
+            elif rpc_method == 'icx_getTransactionResult':
+                self._observe_receipt(request.get('params'), response['result'])
+
+    def _track_transaction(self, tx_hash: str, score_method: str):
+        self._transactions[tx_hash] = score_method
+        if len(self._transactions) > MAX_TRACKED_TRANSACTIONS:
+            del self._transactions[next(iter(self._transactions))]
+
+    def _observe_receipt(self, params: Optional[dict], tx_result: dict):
+        if not isinstance(params, dict) or not isinstance(tx_result, dict) or 'status' not in tx_result:
+            return
+
+        # a receipt polled again, or of a transaction sent elsewhere, is not counted
+        score_method = self._transactions.pop(params.get('txHash'), None)
+        if score_method is None:
+            return
+        self._receipts[score_method] = self._receipts.get(score_method, 0) + 1
+        if tx_result['status'] in (0, '0x0'):
+            self._failed_receipts[score_method] = self._failed_receipts.get(score_method, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._errors.clear()
+            self._failed_receipts.clear()
+            self._receipts.clear()
+            self._transactions.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            requests = [
+                dict(transport=key[0], method=key[1], scoreMethod=key[2], errors=self._errors.get(key, 0),
+                     **histogram.to_dict())
+                for key, histogram in sorted(self._latencies.items())
+            ]
+            receipts = [
+                {"scoreMethod": score_method, "receipts": count, "failed": self._failed_receipts.get(score_method, 0)}
+                for score_method, count in sorted(self._receipts.items())
+            ]
+
+        return {"requests": requests, "receipts": receipts}
+
+    def to_prometheus(self) -> str:
+        latency = f"{PROMETHEUS_PREFIX}_rpc_latency_seconds"
+        errors = f"{PROMETHEUS_PREFIX}_rpc_errors_total"
+        receipts = f"{PROMETHEUS_PREFIX}_receipts_total"
+        failed_receipts = f"{PROMETHEUS_PREFIX}_failed_receipts_total"
+        lines = [
+            f"# HELP {latency} JSON-RPC request latency",
+            f"# TYPE {latency} histogram"
+        ]
+
+        with self._lock:
+            for (transport, rpc_method, score_method), histogram in sorted(self._latencies.items()):
+                labels = dict(transport=transport, method=rpc_method, score_method=score_method)
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{latency}_bucket{_labels(le=_format_bound(bound), **labels)} {count}")
+                lines.append(f"{latency}_sum{_labels(**labels)} {histogram.sum!r}")
+                lines.append(f"{latency}_count{_labels(**labels)} {histogram.count}")
+
+            lines.append(f"# HELP {errors} JSON-RPC requests answered with an error or not at all")
+            lines.append(f"# TYPE {errors} counter")
+            for (transport, rpc_method, score_method), count in sorted(self._errors.items()):
+                labels = _labels(transport=transport, method=rpc_method, score_method=score_method)
+                lines.append(f"{errors}{labels} {count}")
+
+            lines.append(f"# HELP {receipts} transaction receipts received")
+            lines.append(f"# TYPE {receipts} counter")
+            for score_method, count in sorted(self._receipts.items()):
+                lines.append(f"{receipts}{_labels(score_method=score_method)} {count}")
+
+            lines.append(f"# HELP {failed_receipts} transaction receipts with status 0")
+            lines.append(f"# TYPE {failed_receipts} counter")
+            for score_method, count in sorted(self._failed_receipts.items()):
+                lines.append(f"{failed_receipts}{_labels(score_method=score_method)} {count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, JSON_FILE_NAME), 'w') as f:
+            json.dump(self.to_dict(), f, indent=4)
+        with open(os.path.join(directory, PROMETHEUS_FILE_NAME), 'w') as f:
+            f.write(self.to_prometheus())
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> 'Metrics':
+    return _metrics
@@ -0,0 +1,140 @@
+import threading
+from functools import wraps
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from iconsdk.builder.transaction_builder import Transaction
+
+NO_TEST = '-'
+
+
+def get_transaction_type(transaction: 'Transaction') -> str:
+    """The SCORE method a transaction calls, or what kind of transaction it is otherwise"""
+    if transaction.data_type == 'call':
+        return transaction.method
+    return transaction.data_type or 'transfer'
+
+
+def get_request_type(request: dict) -> str:
+    """get_transaction_type for a signed request dict"""
+    data_type = request.get('dataType')
+    if data_type == 'call':
+        return request['data']['method']
+    return data_type or 'transfer'
+
+
+def get_common_type(types: Iterable[str]) -> str:
+    types = set(types)
+    return types.pop() if len(types) == 1 else 'mixed'
+
+
+class _Phase:
+    __slots__ = ('_profiler', '_key', '_start', 'children')
+
+    def __init__(self, profiler: 'PhaseProfiler', key: Tuple[str, str, str]):
+        self._profiler = profiler
+        self._key = key
+        self._start = 0.0
+        # time spent in phases entered meanwhile, which they own
+        self.children = 0.0
+
+    def __enter__(self):
+        self._profiler.push(self)
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = perf_counter() - self._start
+        self._profiler.pop(self, self._key, elapsed, elapsed - self.children)
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+class PhaseProfiler:
+    """
+    Attributes wall time to (test, transaction type, phase), where phases are build, sign, serialize,
+    send, query and wait. A phase entered inside another one owns its time, so the time of a phase
+    is what is left after the phases nested in it (the receipt polls of a wait, the build of a create).
+    The totals are written in the collapsed stack format flamegraph.pl and speedscope read,
+    `test;transaction type;phase microseconds`.
+    Nothing is recorded until `enable` is called.
+    """
+
+    def __init__(self):
+        self._enabled = False
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str, str], float] = {}
+        self._test = NO_TEST
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self):
+        self._enabled = True
+
+    def set_test(self, test_id: Optional[str]):
+        self._test = test_id or NO_TEST
+
+    def phase(self, phase: str, transaction_type: str):
+        if not self._enabled:
+            return _NO_PHASE
+        return _Phase(self, (self._test, transaction_type, phase))
+
+    def push(self, phase: '_Phase'):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(phase)
+
+    def pop(self, phase: '_Phase', key: Tuple[str, str, str], elapsed: float, own: float):
+        stack = self._local.stack
+        stack.remove(phase)
+        if stack:
+            stack[-1].children += elapsed
+
+        with self._lock:
+            self._totals[key] = self._totals.get(key, 0.0) + own
+
+    def totals(self) -> Dict[Tuple[str, str, str], float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def to_collapsed(self) -> str:
+        lines = [f"{test};{transaction_type};{phase} {round(seconds * 10 ** 6)}"
+                 for (test, transaction_type, phase), seconds in sorted(self.totals().items())]
+        return ''.join(f'{line}\n' for line in lines)
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            f.write(self.to_collapsed())
+
+
+_profiler = PhaseProfiler()
+
+
+def get_profiler() -> 'PhaseProfiler':
+    return _profiler
+
+
+def profile_phase(phase: str, transaction_type: str) -> Callable:
+    """Decorator profiling each call of the function as `phase` of `transaction_type` transactions"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _profiler.phase(phase, transaction_type):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
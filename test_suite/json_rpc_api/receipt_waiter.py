@@ -0,0 +1,69 @@
+from time import monotonic, sleep
+from typing import Dict, Iterator, List, Tuple
+
+from iconsdk.converter import convert_transaction_result
+
+from .batch_provider import BatchHTTPProvider
+
+DEFAULT_TIMEOUT_BLOCKS = 30
+MIN_POLL_INTERVAL = 0.05
+
+
+class ReceiptWaiter:
+    """
+    Tracks outstanding transaction hashes and polls all of them with one batch request per cycle.
+    The first poll comes one block interval after submission; polls without any new receipt
+    back off towards the block interval, a poll with new receipts shortens the next wait,
+    since the rest usually lands in the following block.
+    A hash still unanswered after `timeout_blocks` intervals is yielded with the node's last error response.
+    """
+
+    def __init__(self,
+                 batch_provider: 'BatchHTTPProvider',
+                 block_confirm_interval: float,
+                 timeout_blocks: int = DEFAULT_TIMEOUT_BLOCKS):
+        self._batch_provider = batch_provider
+        self._block_confirm_interval = max(block_confirm_interval, MIN_POLL_INTERVAL)
+        self._min_delay = max(self._block_confirm_interval / 4, MIN_POLL_INTERVAL)
+        self._timeout = self._block_confirm_interval * timeout_blocks
+        # tx_hash: (submitted at, last response)
+        self._pending: Dict[str, Tuple[float, dict]] = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, tx_hash: str):
+        self._pending[tx_hash] = (monotonic(), {})
+
+    def poll(self) -> List[Tuple[str, dict]]:
+        tx_hashes = list(self._pending)
+        responses = self._batch_provider.make_batch_request(
+            [('icx_getTransactionResult', {'txHash': tx_hash}) for tx_hash in tx_hashes])
+
+        now = monotonic()
+        completed: list = []
+        for tx_hash, response in zip(tx_hashes, responses):
+            submitted_at, _ = self._pending[tx_hash]
+            if isinstance(response, dict) and 'status' in response:
+                convert_transaction_result(response)
+            elif now - submitted_at < self._timeout:
+                self._pending[tx_hash] = (submitted_at, response)
+                continue
+
+            del self._pending[tx_hash]
+            completed.append((tx_hash, response))
+
+        return completed
+
+    def wait(self) -> Iterator[Tuple[str, dict]]:
+        delay = self._block_confirm_interval
+        while self._pending:
+            sleep(delay)
+
+            completed = self.poll()
+            if completed:
+                delay = self._min_delay
+            else:
+                delay = min(delay * 2, self._block_confirm_interval)
+
+            yield from completed
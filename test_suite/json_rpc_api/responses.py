@@ -0,0 +1,155 @@
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+
+def _hex(value: str) -> int:
+    return int(value, 16)
+
+
+def _delegations(value: list) -> List[Tuple[str, int]]:
+    return [(delegation['address'], int(delegation['value'], 16)) for delegation in value]
+
+
+class _Field:
+    """Reads `path` from the raw response on first access and keeps the decoded value in the slot `_<name>`."""
+
+    def __init__(self, *path: str, decode: Callable[[Any], Any] = _hex, default: Any = 0):
+        self._path = path
+        self._decode = decode
+        self._default = default
+        self._slot = None
+
+    def __set_name__(self, owner: type, name: str):
+        self._slot = f"_{name}"
+
+    def __get__(self, view: Optional['ResponseView'], owner: type):
+        if view is None:
+            return self
+        try:
+            return getattr(view, self._slot)
+        except AttributeError:
+            pass
+
+        value = view.raw
+        for key in self._path:
+            value = value.get(key) if isinstance(value, dict) else None
+        value = self._default if value is None else self._decode(value)
+        setattr(view, self._slot, value)
+        return value
+
+
+class ResponseView:
+    """
+    Typed view over a raw JSON-RPC response dict. Fields are decoded once, on first access;
+    item access, `==` against dicts and `raw` still give the response as the node sent it.
+    """
+    __slots__ = ('_raw',)
+
+    def __init__(self, raw: dict):
+        self._raw = raw
+
+    @classmethod
+    def from_responses(cls, responses: list) -> List[Union['ResponseView', dict]]:
+        """Views for batch results; error responses are passed through as they are."""
+        return [cls(response) if isinstance(response, dict) and 'code' not in response else response
+                for response in responses]
+
+    @property
+    def raw(self) -> dict:
+        return self._raw
+
+    def __getitem__(self, key: str):
+        return self._raw[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._raw
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ResponseView):
+            return self._raw == other.raw
+        if isinstance(other, dict):
+            return self._raw == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._raw!r})"
+
+
+class StakeView(ResponseView):
+    __slots__ = ('_stake', '_unstake', '_unstake_block_height')
+
+    stake = _Field('stake')
+    unstake = _Field('unstake')
+    unstake_block_height = _Field('unstakeBlockHeight')
+
+
+class DelegationView(ResponseView):
+    __slots__ = ('_delegations', '_total_delegated', '_voting_power')
+
+    delegations = _Field('delegations', decode=_delegations, default=())
+    total_delegated = _Field('totalDelegated')
+    voting_power = _Field('votingPower')
+
+
+class PRepView(ResponseView):
+    __slots__ = ('_status', '_grade', '_name', '_email', '_website', '_details', '_p2p_endpoint', '_public_key',
+                 '_irep', '_irep_update_block_height', '_stake', '_delegated')
+
+    status = _Field('status')
+    grade = _Field('grade')
+    name = _Field('registration', 'name', decode=str, default=None)
+    email = _Field('registration', 'email', decode=str, default=None)
+    website = _Field('registration', 'website', decode=str, default=None)
+    details = _Field('registration', 'details', decode=str, default=None)
+    p2p_endpoint = _Field('registration', 'p2pEndPoint', decode=str, default=None)
+    public_key = _Field('registration', 'publicKey', decode=str, default=None)
+    irep = _Field('registration', 'irep')
+    irep_update_block_height = _Field('registration', 'irepUpdateBlockHeight')
+    stake = _Field('delegation', 'stake')
+    delegated = _Field('delegation', 'delegated')
+
+
+class PRepSummaryView(ResponseView):
+    """An entry of getPRepList."""
+    __slots__ = ('_address', '_name', '_status', '_grade', '_irep', '_irep_update_block_height',
+                 '_stake', '_delegated')
+
+    address = _Field('address', decode=str, default=None)
+    name = _Field('name', decode=str, default=None)
+    status = _Field('status')
+    grade = _Field('grade')
+    irep = _Field('irep')
+    irep_update_block_height = _Field('irepUpdateBlockHeight')
+    stake = _Field('stake')
+    delegated = _Field('delegated')
+
+
+def _prep_summaries(value: list) -> List['PRepSummaryView']:
+    return [PRepSummaryView(prep) for prep in value]
+
+
+class PRepListView(ResponseView):
+    __slots__ = ('_block_height', '_start_ranking', '_total_stake', '_total_delegated', '_preps')
+
+    block_height = _Field('blockHeight')
+    start_ranking = _Field('startRanking')
+    total_stake = _Field('totalStake')
+    total_delegated = _Field('totalDelegated')
+    preps = _Field('preps', decode=_prep_summaries, default=())
+
+
+class IScoreView(ResponseView):
+    __slots__ = ('_block_height', '_iscore', '_estimated_icx')
+
+    block_height = _Field('blockHeight')
+    iscore = _Field('iscore')
+    estimated_icx = _Field('estimatedICX')
+
+
+class IISSInfoView(ResponseView):
+    __slots__ = ('_block_height', '_next_calculation', '_next_prep_term', '_irep', '_rrep')
+
+    block_height = _Field('blockHeight')
+    next_calculation = _Field('nextCalculation')
+    next_prep_term = _Field('nextPRepTerm')
+    irep = _Field('variable', 'irep')
+    rrep = _Field('variable', 'rrep')
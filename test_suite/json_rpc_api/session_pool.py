@@ -0,0 +1,110 @@
+import json
+from time import perf_counter
+from typing import Dict, Optional
+
+import requests
+from iconsdk.providers.http_provider import HTTPProvider
+from requests.adapters import HTTPAdapter
+
+from .metrics import get_metrics, get_score_method
+from .profiler import get_profiler
+
+# number of endpoints kept connected at once
+DEFAULT_POOL_SIZE = 10
+# keep-alive connections kept per endpoint
+DEFAULT_PER_ENDPOINT_LIMIT = 32
+DEFAULT_TIMEOUT = 10
+
+
+class SessionPool:
+    """
+    One keep-alive requests.Session shared by every provider in the process.
+    `endpoint_limits` overrides `per_endpoint_limit` for the URLs it names (matched by prefix).
+    """
+
+    def __init__(self,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 per_endpoint_limit: int = DEFAULT_PER_ENDPOINT_LIMIT,
+                 endpoint_limits: Optional[Dict[str, int]] = None):
+        self._session = requests.Session()
+        self._adapters = []
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=per_endpoint_limit)
+        self._mount('http://', adapter)
+        self._mount('https://', adapter)
+        for endpoint, limit in (endpoint_limits or {}).items():
+            self._mount(endpoint, HTTPAdapter(pool_connections=1, pool_maxsize=limit))
+
+    def _mount(self, prefix: str, adapter: 'HTTPAdapter'):
+        self._session.mount(prefix, adapter)
+        if adapter not in self._adapters:
+            self._adapters.append(adapter)
+
+    @property
+    def session(self) -> 'requests.Session':
+        return self._session
+
+    def close(self):
+        self._session.close()
+
+    def stats(self) -> Dict[str, int]:
+        new_connections = 0
+        requests_count = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                new_connections += pool.num_connections
+                requests_count += pool.num_requests
+
+        return {
+            "requests": requests_count,
+            "newConnections": new_connections,
+            "reusedConnections": requests_count - new_connections
+        }
+
+
+_session_pool: Optional['SessionPool'] = None
+
+
+def configure_session_pool(pool_size: int = DEFAULT_POOL_SIZE,
+                           per_endpoint_limit: int = DEFAULT_PER_ENDPOINT_LIMIT,
+                           endpoint_limits: Optional[Dict[str, int]] = None) -> 'SessionPool':
+    global _session_pool
+
+    if _session_pool is not None:
+        _session_pool.close()
+    _session_pool = SessionPool(pool_size, per_endpoint_limit, endpoint_limits)
+    return _session_pool
+
+
+def get_session_pool() -> 'SessionPool':
+    if _session_pool is None:
+        return configure_session_pool()
+    return _session_pool
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTPProvider posting through the shared keep-alive session instead of a new session per request."""
+
+    def _make_post_request(self, full_path_url: str, data: dict, **kwargs) -> 'requests.Response':
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        method = data.get('method')
+        request_type = get_score_method(method, data.get('params')) or method
+        profiler = get_profiler()
+        with profiler.phase('send' if method == 'icx_sendTransaction' else 'query', request_type):
+            with profiler.phase('serialize', request_type):
+                body = json.dumps(data)
+            start = perf_counter()
+            try:
+                response = get_session_pool().session.post(url=full_path_url, data=body, **kwargs)
+            except requests.RequestException:
+                get_metrics().observe('http', data, perf_counter() - start, None)
+                raise
+
+        try:
+            content = response.json()
+        except ValueError:
+            content = None
+        get_metrics().observe('http', data, perf_counter() - start, content)
+        return response
@@ -0,0 +1,126 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def get_fee(tx_result: dict) -> int:
+    return tx_result['stepUsed'] * tx_result['stepPrice']
+
+
+class LedgerAccount:
+    __slots__ = ('balance', 'stake', 'unstake', 'unstake_block_height', 'delegations')
+
+    def __init__(self, balance: int = 0):
+        self.balance = balance
+        self.stake = 0
+        self.unstake = 0
+        self.unstake_block_height = 0
+        # (address, value) in the order they were set
+        self.delegations: Tuple[Tuple[str, int], ...] = ()
+
+    @property
+    def total_delegated(self) -> int:
+        return sum(value for _, value in self.delegations)
+
+    def settle(self, block_height: int):
+        """returns the unstake to the balance once its lock is over at `block_height`"""
+        if 0 < self.unstake_block_height < block_height:
+            self.balance += self.unstake
+            self.unstake = 0
+            self.unstake_block_height = 0
+
+    def to_stake_response(self) -> dict:
+        response = {"stake": hex(self.stake)}
+        if self.unstake > 0:
+            response["unstake"] = hex(self.unstake)
+            response["unstakeBlockHeight"] = hex(self.unstake_block_height)
+        return response
+
+    def to_delegation_response(self) -> dict:
+        total_delegated = self.total_delegated
+        return {
+            "delegations": [{"address": address, "value": hex(value)} for address, value in self.delegations],
+            "totalDelegated": hex(total_delegated),
+            "votingPower": hex(self.stake - total_delegated)
+        }
+
+
+class ShadowLedger:
+    """
+    What the node should hold for the accounts a test drives: balance, stake, unstake and delegations,
+    kept up to date from the receipts of the test's transactions (fee, stake, unstake lock, delegation)
+    rather than queried back after each step. A receipt with status 0 only costs its fee.
+    Like the node, an account gets its unstake back once the lock is over, when it is next touched.
+    """
+
+    def __init__(self, unstake_lock_period: int):
+        self._unstake_lock_period = unstake_lock_period
+        self._accounts: Dict[str, 'LedgerAccount'] = {}
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._accounts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._accounts)
+
+    def __getitem__(self, address: str) -> 'LedgerAccount':
+        return self._accounts[address]
+
+    def open(self, address: str, balance: int = 0) -> 'LedgerAccount':
+        account = self._accounts[address] = LedgerAccount(balance)
+        return account
+
+    def _apply_receipt(self, address: str, tx_result: dict) -> Optional['LedgerAccount']:
+        """charges the fee; the account, if the transaction went through"""
+        account = self._accounts[address]
+        account.settle(tx_result['blockHeight'])
+        account.balance -= get_fee(tx_result)
+        return account if tx_result['status'] == 1 else None
+
+    def transfer(self, from_: str, to: str, value: int, tx_result: dict):
+        account = self._apply_receipt(from_, tx_result)
+        if account is None:
+            return
+        account.balance -= value
+        if to in self._accounts:
+            self._accounts[to].balance += value
+
+    def set_stake(self, address: str, stake: int, tx_result: dict):
+        account = self._apply_receipt(address, tx_result)
+        if account is None:
+            return
+
+        # a raised stake takes back the unstake first, a lowered one locks the difference again
+        total = account.stake + account.unstake
+        if stake > total:
+            account.balance -= stake - total
+            account.unstake = 0
+            account.unstake_block_height = 0
+        elif stake < total:
+            account.unstake = total - stake
+            account.unstake_block_height = tx_result['blockHeight'] + self._unstake_lock_period
+        else:
+            account.unstake = 0
+            account.unstake_block_height = 0
+        account.stake = stake
+
+    def set_delegation(self, address: str, delegations: List[Tuple[str, int]], tx_result: dict):
+        account = self._apply_receipt(address, tx_result)
+        if account is None:
+            return
+        account.delegations = tuple((prep, value) for prep, value in delegations if value > 0)
+
+    def expected_balance(self, address: str, block_height: int) -> int:
+        account = self._accounts[address]
+        account.settle(block_height)
+        return account.balance
+
+    def expected_stake(self, address: str, block_height: int) -> dict:
+        """getStake response, as the node answers it when its last block is `block_height`"""
+        account = self._accounts[address]
+        account.settle(block_height)
+        return account.to_stake_response()
+
+    def expected_delegation(self, address: str) -> dict:
+        return self._accounts[address].to_delegation_response()
@@ -0,0 +1,84 @@
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Optional
+
+from iconsdk.builder.transaction_builder import Transaction
+from iconsdk.signed_transaction import SignedTransaction
+from iconsdk.wallet.wallet import KeyWallet
+
+from .profiler import get_common_type, get_profiler, get_transaction_type
+
+# below this many transactions, pickling to the pool costs more than signing inline
+MIN_PARALLEL_SIGN_COUNT = 64
+DEFAULT_CHUNK_SIZE = 256
+
+# worker-side cache, so a wallet's key is loaded once per worker process
+_wallets: Dict[bytes, 'KeyWallet'] = {}
+
+
+def _load_wallet(private_key: bytes) -> 'KeyWallet':
+    wallet = _wallets.get(private_key)
+    if wallet is None:
+        wallet = KeyWallet.load(private_key)
+        _wallets[private_key] = wallet
+    return wallet
+
+
+def _sign_chunk(chunk: List[Tuple['Transaction', bytes]]) -> List[dict]:
+    return [SignedTransaction(transaction, _load_wallet(private_key)).signed_transaction_dict
+            for transaction, private_key in chunk]
+
+
+class PreSignedTransaction(SignedTransaction):
+    """SignedTransaction wrapping a request dict that already carries its signature."""
+
+    def __init__(self, signed_transaction_dict: dict):
+        self.__signed_transaction_dict = signed_transaction_dict
+
+    @property
+    def signed_transaction_dict(self) -> dict:
+        return self.__signed_transaction_dict
+
+
+class BulkSigner:
+    """Signs transactions on a process pool, returning them in input order."""
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._max_workers = max_workers or os.cpu_count()
+        self._chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> 'ProcessPoolExecutor':
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            atexit.register(self.close)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def sign(self, transactions: Iterable[Tuple['Transaction', 'KeyWallet']]) -> List['SignedTransaction']:
+        pairs = [(transaction, bytes.fromhex(key_wallet.get_private_key()))
+                 for transaction, key_wallet in transactions]
+
+        profiler = get_profiler()
+        transaction_type = get_common_type(get_transaction_type(transaction) for transaction, _ in pairs) \
+            if profiler.enabled else ''
+        with profiler.phase('sign', transaction_type):
+            return self._sign(pairs)
+
+    def _sign(self, pairs: List[Tuple['Transaction', bytes]]) -> List['SignedTransaction']:
+        if len(pairs) < MIN_PARALLEL_SIGN_COUNT or self._max_workers < 2:
+            return [PreSignedTransaction(request) for request in _sign_chunk(pairs)]
+
+        chunks = [pairs[start:start + self._chunk_size] for start in range(0, len(pairs), self._chunk_size)]
+        signed_transactions: list = []
+        for requests in self._get_executor().map(_sign_chunk, chunks):
+            signed_transactions.extend(PreSignedTransaction(request) for request in requests)
+
+        return signed_transactions
@@ -0,0 +1,56 @@
+from typing import Dict, Optional
+
+
+class TermCache:
+    """
+    Keeps responses of system queries which only change when I-Score is calculated or a term starts.
+    Entries stay valid until the block height reaches `valid_until`, the `nextCalculation`
+    (or `nextPRepTerm`, if earlier) of the getIISSInfo response they were cached with.
+    Heights are learned from `observe`, so the cache is only as fresh as the heights reported to it;
+    the `blockHeight` field of a cached response is that of the block it was fetched at.
+    """
+
+    def __init__(self):
+        self._responses: Dict[str, dict] = {}
+        self._valid_until = -1
+        self._block_height = -1
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def valid_until(self) -> int:
+        return self._valid_until
+
+    def observe(self, block_height: int):
+        self._block_height = max(self._block_height, block_height)
+        if self._block_height >= self._valid_until:
+            self._responses.clear()
+
+    def get(self, method: str) -> Optional[dict]:
+        response = self._responses.get(method)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, method: str, response: dict, valid_until: int):
+        if valid_until != self._valid_until:
+            self._responses.clear()
+            self._valid_until = valid_until
+        if self._block_height < valid_until:
+            self._responses[method] = response
+
+    def invalidate(self):
+        self._responses.clear()
+        self._valid_until = -1
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "validUntil": self._valid_until}
+
+    @staticmethod
+    def get_valid_until(iiss_info: dict) -> int:
+        next_calculation = int(iiss_info['nextCalculation'], 16)
+        next_prep_term = int(iiss_info.get('nextPRepTerm', hex(next_calculation)), 16)
+        # nextPRepTerm is 0 before decentralization
+        return min(next_calculation, next_prep_term) if next_prep_term > 0 else next_calculation
@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, List, Tuple, Dict
 from iconsdk.wallet.wallet import KeyWallet
 
 from .base import Base
+from .delegation_scenario import DelegationScenario
 
 if TYPE_CHECKING:
     from iconsdk.signed_transaction import SignedTransaction
@@ -582,3 +583,12 @@ class TestDelegation(Base):
                 "delegated": hex(0)
             }
             self.assertEqual(expected_result, delegation)
+
+    def test_delegation_scenario(self):
+        prep_count: int = 20
+
+        # 20 fresh P-Reps, registered by the scenario run, and 500 delegators with 0 ~ 10 delegations each,
+        # checked 100 at a time
+        preps: List['KeyWallet'] = [KeyWallet.create() for _ in range(prep_count)]
+        scenario = DelegationScenario(preps, delegator_count=500, stake=100)
+        self.run_delegation_scenario(scenario, chunk_size=100, register_preps=True)
@@ -1,34 +1,22 @@
+import random
 from typing import TYPE_CHECKING, List, Tuple, Dict
 
 from iconsdk.wallet.wallet import KeyWallet
 
 from .base import Base
+from .iscore import calculate_iscore, calculate_period_iscore, calculate_claimable_iscore, claim_remainder
+from .responses import IISSInfoView, IScoreView
 
 if TYPE_CHECKING:
     from iconsdk.signed_transaction import SignedTransaction
 
-min_rrep = 200
-min_delegation = 788400
-block_per_year = 15768000
-gv_divider = 10000
-iscore_multiplier = 1000
-reward_divider = block_per_year * gv_divider / iscore_multiplier
-
 
 class TestIScore(Base):
     MIN_DELEGATION = 788_400
 
     def _calculate_iscore(self, delegation: int, from_: int, to: int) -> int:
-        if delegation < min_delegation:
-            return 0
-
-        iiss_info = self.get_iiss_info()
-        rrep = int(iiss_info['variable'].get('rrep'), 16)
-        if rrep < min_rrep:
-            return 0
-
-        # iscore = delegation_amount * period * rrep / reward_divider
-        return int(delegation * rrep * (to - from_) / reward_divider)
+        rrep = IISSInfoView(self.get_iiss_info()).rrep
+        return int(calculate_iscore(delegation, rrep, to - from_))
 
     def test_iscore(self):
         stake_value: int = self.MIN_DELEGATION * 1000
@@ -123,7 +111,7 @@ class TestIScore(Base):
 
         # queryIScore
         response: dict = self.query_iscore(accounts[0])
-        iscore_after_claim: int = (iscore1 + iscore2) % 1000
+        iscore_after_claim: int = claim_remainder(iscore1 + iscore2)
         self.assertEqual(hex(iscore_after_claim), response['iscore'])
         self.assertEqual(hex(calculate2_block_height), response['blockHeight'])
 
@@ -134,3 +122,56 @@ class TestIScore(Base):
         response: dict = self.query_iscore(accounts[0])
         self.assertEqual(hex(iscore_after_claim + iscore3), response['iscore'])
         self.assertEqual(hex(calculate3_block_height), response['blockHeight'])
+
+    def test_iscore_population(self):
+        delegator_count: int = 500
+        stake_value: int = self.MIN_DELEGATION * 1000
+
+        prep: 'KeyWallet' = KeyWallet.create()
+        accounts: List['KeyWallet'] = [KeyWallet.create() for _ in range(delegator_count)]
+
+        transactions: list = [(self.build_transfer_icx_tx(self._test1, account.get_address(), stake_value), self._test1)
+                              for account in [prep] + accounts]
+        tx_results: list = self.process_transaction_bulk(self.sign_transaction_bulk(transactions), self.icon_service)
+        for tx_result in tx_results:
+            self.assertEqual(True, tx_result['status'])
+
+        tx_result: dict = self.process_transaction(self.create_register_prep_tx(prep), self.icon_service)
+        self.assertEqual(True, tx_result['status'])
+
+        transactions: list = [(self.build_set_stake_tx(account, stake_value), account) for account in accounts]
+        tx_results: list = self.process_transaction_bulk(self.sign_transaction_bulk(transactions), self.icon_service)
+        for tx_result in tx_results:
+            self.assertEqual(True, tx_result['status'])
+
+        # delegate right after a calculation, so every period the delegations earn in is observed below
+        delegation_start: int = self._make_blocks_to_next_calculation()
+        first_calculation: int = IISSInfoView(self.get_iiss_info()).next_calculation
+
+        # some delegations stay below the minimum and earn nothing
+        delegation_values: List[int] = [random.randint(self.MIN_DELEGATION // 2, stake_value) for _ in accounts]
+        transactions: list = [(self.build_set_delegation_tx(account, [(prep, value)]), account)
+                              for account, value in zip(accounts, delegation_values)]
+        tx_results: list = self.process_transaction_bulk(self.sign_transaction_bulk(transactions), self.icon_service)
+        for tx_result in tx_results:
+            self.assertEqual(True, tx_result['status'])
+        delegation_blocks: List[int] = [tx_result['blockHeight'] for tx_result in tx_results]
+        # the oracle assumes no calculation falls between the delegations
+        self.assertLess(delegation_start, min(delegation_blocks))
+        self.assertLess(max(delegation_blocks), first_calculation)
+
+        # rrep is sampled once per calculation
+        calculation_heights: List[int] = []
+        rreps: List[int] = []
+        for _ in range(3):
+            calculation_heights.append(self._make_blocks_to_next_calculation())
+            rreps.append(IISSInfoView(self.get_iiss_info()).rrep)
+        self.assertEqual(first_calculation, calculation_heights[0])
+
+        period_iscore = calculate_period_iscore(delegation_values, delegation_blocks, calculation_heights, rreps)
+        expected_iscore = calculate_claimable_iscore(period_iscore)
+
+        responses: List['IScoreView'] = IScoreView.from_responses(self.query_iscore_batch(accounts))
+        for expected, response in zip(expected_iscore[:, -1], responses):
+            self.assertEqual(expected, response.iscore)
+            self.assertEqual(calculation_heights[-2], response.block_height)
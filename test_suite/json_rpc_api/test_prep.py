@@ -1,36 +1,20 @@
 from typing import List
 
-from iconsdk.builder.transaction_builder import TransactionBuilder
-from iconsdk.signed_transaction import SignedTransaction
 from iconsdk.wallet.wallet import KeyWallet
 
 from .base import Base
+from .responses import PRepListView
 
 
 class TestPRep(Base):
     TEST_HTTP_ENDPOINT_URI_V3 = "http://127.0.0.1:9000/api/v3"
 
-    def _distribute_icx(self, addresses: List['KeyWallet']):
-        tx_list = []
-        for key_wallet in addresses:
-            transaction = TransactionBuilder(). \
-                value(10**20). \
-                from_(self._test1.get_address()). \
-                to(key_wallet.get_address()). \
-                nid(3). \
-                nonce(1). \
-                step_limit(1000000). \
-                version(3). \
-                build()
-            signed_transaction = SignedTransaction(transaction, self._test1)
-            tx_list.append(signed_transaction)
-        return tx_list
+    def _lease_accounts(self, count: int, balance: int = 10**20) -> List['KeyWallet']:
+        # pooled accounts, funded only when they fell below `balance`; registered ones are retired on release
+        return self.lease_wallets(count, min_balance=balance, top_up_balance=balance)
 
     def test_1_register_one_prep_invalid_case1(self):
-        account = KeyWallet.create()
-        tx = self.create_transfer_icx_tx(self._test1, account.get_address(), 10**18)
-        tx_result = self.process_transaction(tx, self.icon_service)
-        self.assertEqual(tx_result['status'], 1)
+        account, = self._lease_accounts(1, 10**18)
         params = {
             "name": "banana node",
             "email": "banana@banana.com",
@@ -46,10 +30,7 @@ class TestPRep(Base):
         self.assertTrue(response['message'].startswith('P-Rep not found: '))
 
     def test_2_register_one_prep_invalid_case2(self):
-        account = KeyWallet.create()
-        tx = self.create_transfer_icx_tx(self._test1, account.get_address(), 10**18)
-        tx_result = self.process_transaction(tx, self.icon_service)
-        self.assertEqual(tx_result['status'], 1)
+        account, = self._lease_accounts(1, 10**18)
         params = {
             "name": "banana node",
             "email": "banana@banana.com",
@@ -65,10 +46,7 @@ class TestPRep(Base):
         self.assertTrue(response['message'].startswith('P-Rep not found: '))
 
     def test_3_register_one_prep(self):
-        account = KeyWallet.create()
-        tx = self.create_transfer_icx_tx(self._test1, account.get_address(), 10**18)
-        tx_result = self.process_transaction(tx, self.icon_service)
-        self.assertEqual(tx_result['status'], 1)
+        account, = self._lease_accounts(1, 10**18)
         params = {
             "name": "banana node",
             "email": "banana@banana.com",
@@ -124,9 +102,10 @@ class TestPRep(Base):
         self.assertNotEqual(prep_data['irep'], hex(irep))
 
     def test_4_register_100_preps_and_check_total_delegated(self):
+        # registered accounts can never be leased again, so the P-Reps are fresh wallets, not pooled ones
         accounts = [KeyWallet.create() for _ in range(100)]
-        tx_list = self._distribute_icx(accounts)
-        self.process_transaction_bulk(tx_list, self.icon_service)
+        self._process_transactions_ok(self.create_transfer_icx_tx(self._test1, account.get_address(), 10**20)
+                                      for account in accounts)
         tx_list = []
         for i in range(100):
             params = {
@@ -137,9 +116,10 @@ class TestPRep(Base):
                 "publicKey": f"0x1234",
                 "p2pEndPoint": f"target://{i}.213.123.123:7100"
             }
-            tx = self.create_register_prep_tx(accounts[i], params, step_limit=10000000)
-            tx_list.append(tx)
+            transaction = self.build_register_prep_tx(accounts[i], params, step_limit=10000000)
+            tx_list.append((transaction, accounts[i]))
 
+        tx_list = self.sign_transaction_bulk(tx_list)
         tx_results = self.process_transaction_bulk(tx_list, self.icon_service)
 
         for result in tx_results:
@@ -147,9 +127,7 @@ class TestPRep(Base):
 
         # check total delegated
         # distribute icx
-        delegators = [KeyWallet.create() for _ in range(10)]
-        tx_list = self._distribute_icx(delegators)
-        self.process_transaction_bulk(tx_list, self.icon_service)
+        delegators = self._lease_accounts(10)
 
         # stake
         stake_tx_list = []
@@ -173,6 +151,9 @@ class TestPRep(Base):
             delegate_tx_list.append(tx)
         self.process_transaction_bulk(delegate_tx_list, self.icon_service)
 
-        # check total Delegated 50 to 70
-        response_50_to_70 = self.get_prep_list(50, 70)
-        print(response_50_to_70)
+        # check the whole ranking, streamed page by page, against the 50 to 70 window
+        delegated = [prep.delegated for prep in self.iter_preps(page_size=20)]
+        self.assertEqual(sorted(delegated, reverse=True), delegated)
+
+        response_50_to_70 = PRepListView(self.get_prep_list(50, 70))
+        self.assertEqual(delegated[49:70], [prep.delegated for prep in response_50_to_70.preps])
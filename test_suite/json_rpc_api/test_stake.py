@@ -5,6 +5,8 @@ from iconservice.icon_config import default_icon_config
 from iconservice.icon_constant import ConfigKey
 
 from .base import Base
+from .shadow_ledger import ShadowLedger
+from .unstake_scheduler import UnstakeScheduler
 
 
 ICX_FACTOR = 10 ** 18
@@ -15,28 +17,11 @@ class TestStake(Base):
     def setUp(self):
         super().setUp()
 
-        self.accounts: list = []
         init_balance: int = 100 * ICX_FACTOR
         init_account_count: int = 101
-        self._make_account_bulk(self.accounts, balance=init_balance, count=init_account_count)
-
-    def _make_account_bulk(self, accounts: list, balance: int = 1000, count: int = 100) -> None:
-        tx_list: list = []
-        for i in range(count):
-            # create account
-            account: 'KeyWallet' = KeyWallet.create()
-            accounts.append(account)
-
-            # Generates an instance of transaction for sending icx.
-            signed_transaction = self.create_transfer_icx_tx(self._test1, account.get_address(), balance)
-            tx_list.append(signed_transaction)
-
-        # process the transaction
-        tx_results: list = self.process_transaction_bulk(tx_list, self.icon_service)
-
-        for tx in tx_results:
-            self.assertTrue('status' in tx)
-            self.assertEqual(1, tx['status'])
+        # pooled accounts, funded only when they fell below init_balance, released when the test ends
+        self.accounts: list = self.lease_wallets(init_account_count, min_balance=init_balance,
+                                                 top_up_balance=init_balance)
 
     def _stake(self, account: 'KeyWallet', stake_value: int):
 
@@ -50,12 +35,6 @@ class TestStake(Base):
 
         return tx_result
 
-    def _make_dummy_block(self):
-        tx_result = self.process_message_tx(self.icon_service)
-
-        self.assertTrue('status' in tx_result)
-        self.assertEqual(1, tx_result['status'])
-
     def test_stake_for_one_time(self):
         stake_value: int = 100
         half_of_stake_value: int = 100 // 2
@@ -123,126 +102,71 @@ class TestStake(Base):
         }
         self.assertEqual(expect_result, respones_for_stake)
 
-        for _ in range(8):
-            self._make_dummy_block()
+        # make the blocks until the unstake is released
+        scheduler = UnstakeScheduler()
+        scheduler.observe(account.get_address(), respones_for_stake)
+        released = self.advance_to_next_release(scheduler)
+        self.assertEqual([account.get_address()], released)
 
-        # un-stake 100%
+        # un-stake 100%, after the unstake is released
         tx_result = self._stake(account, unstake_value)
         fee5 = tx_result['stepUsed'] * tx_result['stepPrice']
         fee_list.append(fee5)
         balance = self.icon_service.get_balance(account.get_address())
-        self.assertEqual(init_balance - stake_value - sum(fee_list), balance)
+        self.assertEqual(init_balance - sum(fee_list), balance)
         respones_for_stake = self.get_stake(account)
         expect_result = {
-            "stake": hex(0),
-            "unstake": hex(100),
-            "unstakeBlockHeight": hex(tx_result["blockHeight"] + unstake_lock_period)
+            "stake": hex(0)
         }
         self.assertEqual(expect_result, respones_for_stake)
 
+    def _stake_bulk(self, ledger: 'ShadowLedger', stake_value: int):
+        stake_tx_list = [self.create_set_stake_tx(account, stake_value) for account in self.accounts]
+        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
+        self.assertEqual(len(self.accounts), len(tx_results))
+        for account, tx_result in zip(self.accounts, tx_results):
+            self.assertTrue('status' in tx_result)
+            self.assertEqual(1, tx_result['status'])
+            ledger.set_stake(account.get_address(), stake_value, tx_result)
+
     def test_stake_for_100_times(self):
         stake_value: int = 100
         part_of_stake_value: int = randrange(1, 100)
-        unstake_value: int = stake_value - part_of_stake_value
         unstake_lock_period = default_icon_config[ConfigKey.IISS_UNSTAKE_LOCK_PERIOD]
-        init_balance_list = [self.icon_service.get_balance(account.get_address())
-                             for account in self.accounts]
-        fee_list = []
-
-        # stake random
-        stake_tx_list = [self.create_set_stake_tx(account, part_of_stake_value) for account in self.accounts]
-        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
-        balance_list1 = [self.icon_service.get_balance(account.get_address()) for account in self.accounts]
 
-        first_fee_list = []
-        for index, tx_result in enumerate(tx_results):
-            fee = tx_result['stepUsed'] * tx_result['stepPrice']
-            first_fee_list.append(fee)
-            self.assertEqual(init_balance_list[index] - part_of_stake_value - fee, balance_list1[index])
+        ledger = ShadowLedger(unstake_lock_period)
+        balances = self.get_balance_batch(self.accounts)
+        self.assertEqual(len(self.accounts), len(balances))
+        for account, balance in zip(self.accounts, balances):
+            ledger.open(account.get_address(), balance)
 
-        for account in self.accounts:
-            respones_for_stake = self.get_stake(account)
-
-            expect_result = {
-                "stake": hex(part_of_stake_value)
-            }
-
-            self.assertEqual(expect_result, respones_for_stake)
+        # stake random
+        self._stake_bulk(ledger, part_of_stake_value)
+        self.assert_ledger(ledger, self.accounts)
 
         # stake 100%
-        stake_tx_list = [self.create_set_stake_tx(account, stake_value) for account in self.accounts]
-        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
-        balance_list2 = [self.icon_service.get_balance(account.get_address()) for account in self.accounts]
-        second_fee_list = []
-        for index, tx_result in enumerate(tx_results):
-            fee = tx_result['stepUsed'] * tx_result['stepPrice']
-            second_fee_list.append(fee)
-            self.assertEqual(init_balance_list[index] - stake_value - first_fee_list[index] - fee,
-                             balance_list2[index])
-
-        for account in self.accounts:
-            respones_for_stake = self.get_stake(account)
-
-            expect_result = {
-                "stake": hex(stake_value)
-            }
-
-            self.assertEqual(expect_result, respones_for_stake)
+        self._stake_bulk(ledger, stake_value)
+        self.assert_ledger(ledger, self.accounts)
 
         # un-stake random
-        stake_tx_list = [self.create_set_stake_tx(account, part_of_stake_value) for account in self.accounts]
-        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
-        balance_list3 = [self.icon_service.get_balance(account.get_address()) for account in self.accounts]
-        third_fee_list = []
-        for index, tx_result in enumerate(tx_results):
-            fee = tx_result['stepUsed'] * tx_result['stepPrice']
-            third_fee_list.append(fee)
-            self.assertEqual(init_balance_list[index] - stake_value -
-                             first_fee_list[index] - second_fee_list[index] - fee, balance_list3[index])
-
-            respones_for_stake = self.get_stake(self.accounts[index])
-
-            expect_result = {
-                "stake": hex(part_of_stake_value),
-                "unstake": hex(unstake_value),
-                "unstakeBlockHeight": hex(tx_result["blockHeight"] + unstake_lock_period)
-            }
-
-            self.assertEqual(expect_result, respones_for_stake)
+        self._stake_bulk(ledger, part_of_stake_value)
+        self.assert_ledger(ledger, self.accounts)
 
         # un-stake 100%
-        stake_tx_list = [self.create_set_stake_tx(account, 0) for account in self.accounts]
-        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
-        balance_list4 = [self.icon_service.get_balance(account.get_address()) for account in self.accounts]
-        fourth_fee_list = []
-        for index, tx_result in enumerate(tx_results):
-            fee = tx_result['stepUsed'] * tx_result['stepPrice']
-            fourth_fee_list.append(fee)
-            self.assertEqual(init_balance_list[index] - stake_value - first_fee_list[index] - second_fee_list[index] -
-                             third_fee_list[index] - fee, balance_list4[index])
-
-            respones_for_stake = self.get_stake(self.accounts[index])
-            expect_result = {
-                "stake": hex(0),
-                "unstake": hex(100),
-                "unstakeBlockHeight": hex(tx_result["blockHeight"] + unstake_lock_period)
-            }
-            self.assertEqual(expect_result, respones_for_stake)
-
-        for _ in range(8):
-            self._make_dummy_block()
+        self._stake_bulk(ledger, 0)
+        self.assert_ledger(ledger, self.accounts)
 
-        # un-stake 100%
-        stake_tx_list = [self.create_set_stake_tx(account, 0) for account in self.accounts]
-        tx_results = self.process_transaction_bulk(stake_tx_list, self.icon_service)
-        balance_list5 = [self.icon_service.get_balance(account.get_address()) for account in self.accounts]
-
-        for index, tx_result in enumerate(tx_results):
-            fee = tx_result['stepUsed'] * tx_result['stepPrice']
-            self.assertEqual(init_balance_list[index] - first_fee_list[index] - second_fee_list[index]
-                             - third_fee_list[index] - fourth_fee_list[index] - fee, balance_list5[index])
-            respones_for_stake = self.get_stake(self.accounts[index])
-            expect_result = {
-                "stake": hex(0),
-            }
-            self.assertEqual(expect_result, respones_for_stake)
+        # the unstakes may be locked in several blocks; make blocks until every one is released
+        scheduler = UnstakeScheduler()
+        for account in self.accounts:
+            scheduler.schedule(account.get_address(), ledger[account.get_address()].unstake_block_height)
+        released = []
+        while len(scheduler) > 0:
+            released.extend(self.advance_to_next_release(scheduler))
+        self.assertEqual(sorted(account.get_address() for account in self.accounts), sorted(released))
+
+        # un-stake 100%, after the unstake is released
+        self._stake_bulk(ledger, 0)
+        self.assert_ledger(ledger, self.accounts)
+        for account in self.accounts:
+            self.assertEqual(0, ledger[account.get_address()].unstake)
@@ -0,0 +1,119 @@
+from base64 import b64encode
+from functools import lru_cache
+from hashlib import sha3_256
+from time import time
+from typing import Optional, Union
+
+from iconsdk.libs.serializer import translator
+from iconsdk.wallet.wallet import KeyWallet
+
+from .profiler import get_profiler
+from .signer import PreSignedTransaction
+
+
+def _encode(data: Union[dict, list, str, int, None]) -> str:
+    # same encoding as iconsdk.libs.serializer, which signs `icx_sendTransaction.<key>.<value>...`
+    if isinstance(data, dict):
+        return "{" + ".".join(f"{key}.{_encode(data[key])}" for key in sorted(data)) + "}"
+    if isinstance(data, list):
+        return "[" + ".".join(_encode(item) for item in data) + "]"
+    if data is None:
+        return "\\0"
+    return str(data).translate(translator)
+
+
+class TransactionTemplate:
+    """
+    Invariant part of a transaction (`stepLimit`, `nid`, `nonce`, the call method and usually `to`),
+    encoded once. `stamp` fills in the sender, value and call params of a request
+    (and the recipient, for a template without `to`);
+    `sign` also assembles the signed message from the pre-encoded pieces,
+    so neither a builder chain nor a deep copy and full re-encoding of the request happens per transaction.
+    """
+
+    def __init__(self,
+                 step_limit: int,
+                 nid: int,
+                 nonce: Optional[int] = 0,
+                 to: Optional[str] = None,
+                 method: Optional[str] = None):
+        self._method = method
+        self._base = {
+            "version": hex(3),
+            "stepLimit": hex(step_limit),
+            "nid": hex(nid)
+        }
+        if to is not None:
+            self._base["to"] = to
+        if nonce is not None:
+            self._base["nonce"] = hex(nonce)
+        if method is not None:
+            self._base["dataType"] = "call"
+
+        # keys are signed in sorted order: data, dataType, from, nid, nonce, stepLimit, timestamp, to, value, version
+        self._data_prefix = f"icx_sendTransaction.data.{{method.{_encode(method)}" if method is not None else None
+        self._from_prefix = "}.dataType.call.from." if method is not None else "icx_sendTransaction.from."
+        nonce_part = f".nonce.{self._base['nonce']}" if nonce is not None else ""
+        self._timestamp_prefix = f".nid.{self._base['nid']}{nonce_part}.stepLimit.{self._base['stepLimit']}.timestamp."
+        self._suffix = f".version.{self._base['version']}"
+
+    def stamp(self,
+              from_: str,
+              value: int = 0,
+              params: Optional[dict] = None,
+              to: Optional[str] = None,
+              timestamp: Optional[int] = None) -> dict:
+        request = self._base.copy()
+        request["from"] = from_
+        if to is not None:
+            request["to"] = to
+        request["value"] = hex(value)
+        request["timestamp"] = hex(timestamp if timestamp is not None else int(time() * 10 ** 6))
+        if self._method is not None:
+            data = {"method": self._method}
+            if params is not None:
+                data["params"] = params
+            request["data"] = data
+
+        return request
+
+    def serialize(self, request: dict) -> bytes:
+        parts = []
+        if self._data_prefix is not None:
+            parts.append(self._data_prefix)
+            params = request["data"].get("params")
+            if params is not None:
+                parts.append(f".params.{_encode(params)}")
+        parts += [self._from_prefix, request["from"],
+                  self._timestamp_prefix, request["timestamp"],
+                  ".to.", _encode(request["to"]),
+                  ".value.", request["value"],
+                  self._suffix]
+
+        return "".join(parts).encode()
+
+    def sign(self,
+             key_wallet: 'KeyWallet',
+             value: int = 0,
+             params: Optional[dict] = None,
+             to: Optional[str] = None) -> 'PreSignedTransaction':
+        profiler = get_profiler()
+        transaction_type = self._method or 'transfer'
+        with profiler.phase('build', transaction_type):
+            request = self.stamp(key_wallet.get_address(), value, params, to)
+        with profiler.phase('serialize', transaction_type):
+            serialized = self.serialize(request)
+        with profiler.phase('sign', transaction_type):
+            signature = key_wallet.sign(sha3_256(serialized).digest())
+        request["signature"] = b64encode(signature).decode()
+
+        return PreSignedTransaction(request)
+
+
+@lru_cache(maxsize=None)
+def get_transaction_template(step_limit: int,
+                             nid: int,
+                             nonce: Optional[int] = 0,
+                             to: Optional[str] = None,
+                             method: Optional[str] = None) -> 'TransactionTemplate':
+    return TransactionTemplate(step_limit, nid, nonce, to, method)
@@ -0,0 +1,61 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from .responses import StakeView
+
+
+class UnstakeScheduler:
+    """
+    Pending unstakes by unstakeBlockHeight, on a heap, so a test can make exactly the blocks
+    needed for the next release instead of guessing from the lock period.
+    The node releases an unstake once its last block is past unstakeBlockHeight.
+    Scheduling an account again replaces its earlier entry, which is dropped lazily.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[int, str]] = []
+        # address: unstakeBlockHeight
+        self._pending: Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._pending
+
+    def schedule(self, address: str, unstake_block_height: int):
+        if unstake_block_height <= 0:
+            self._pending.pop(address, None)
+            return
+        if self._pending.get(address) == unstake_block_height:
+            return
+
+        self._pending[address] = unstake_block_height
+        heapq.heappush(self._heap, (unstake_block_height, address))
+
+    def observe(self, address: str, stake_response: dict):
+        """schedules from a getStake response; one without unstake cancels the account's entry"""
+        self.schedule(address, StakeView(stake_response).unstake_block_height)
+
+    def _drop_stale(self):
+        while self._heap:
+            unstake_block_height, address = self._heap[0]
+            if self._pending.get(address) == unstake_block_height:
+                return
+            heapq.heappop(self._heap)
+
+    def next_release_height(self) -> Optional[int]:
+        """the first block height at which some pending unstake is released, None if none is pending"""
+        self._drop_stale()
+        return self._heap[0][0] + 1 if self._heap else None
+
+    def pop_released(self, block_height: int) -> List[str]:
+        """addresses whose unstake is released once the last block is `block_height`, in release order"""
+        released = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] < block_height:
+            _, address = heapq.heappop(self._heap)
+            del self._pending[address]
+            released.append(address)
+            self._drop_stale()
+        return released
@@ -0,0 +1,114 @@
+import json
+import os
+from collections import deque
+from hashlib import sha3_256
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from iconsdk.wallet.wallet import KeyWallet
+
+if TYPE_CHECKING:
+    from .key_store import KeyStore
+
+DEFAULT_POOL_PATH = os.path.abspath('.wallet_pool.json')
+DEFAULT_SEED = 'icon-service-test-suite'
+
+
+def derive_private_key(seed: str, index: int) -> bytes:
+    return sha3_256(seed.encode() + index.to_bytes(8, 'big')).digest()
+
+
+class WalletPool:
+    """
+    Deterministic wallets derived from `seed`, persisted across runs as a cursor plus a free list.
+    `lease` hands out released wallets first, then derives new ones.
+    Only wallets given back with `release` are reused, so a wallet left staked,
+    delegated or registered as a P-Rep is never handed out again.
+    Wallets are not cached: those within the key store are read from its mapped records on every `wallet`,
+    so the pool stays the same size however many it handed out.
+    """
+
+    def __init__(self, path: str = DEFAULT_POOL_PATH, seed: str = DEFAULT_SEED, key_store: Optional['KeyStore'] = None):
+        self._path = path
+        self._seed = seed
+        # keys of the pre-funded genesis accounts, if they were derived from the same seed
+        self._key_store = key_store if key_store is not None and key_store.seed == seed else None
+        self._next_index = 0
+        self._free = deque()
+        # address: index of the leased wallets derived past the key store, until they are released
+        self._derived_indexes: Dict[str, int] = {}
+
+        self._load()
+
+    def __len__(self):
+        return len(self._free)
+
+    def _load(self):
+        if not os.path.exists(self._path):
+            return
+
+        with open(self._path) as f:
+            state = json.load(f)
+
+        # a pool file written for another seed describes other wallets
+        if state.get('seed') != self._seed:
+            return
+
+        self._next_index = state['nextIndex']
+        self._free.extend(state['free'])
+
+    def save(self):
+        state = {
+            'seed': self._seed,
+            'nextIndex': self._next_index,
+            'free': list(self._free)
+        }
+        tmp_path = f'{self._path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._path)
+
+    def wallet(self, index: int) -> 'KeyWallet':
+        if self._key_store is not None and index in self._key_store:
+            return self._key_store.wallet(index)
+        return KeyWallet.load(derive_private_key(self._seed, index))
+
+    def _lease_wallet(self, index: int) -> 'KeyWallet':
+        wallet = self.wallet(index)
+        if self._key_store is None or index not in self._key_store:
+            self._derived_indexes[wallet.get_address()] = index
+        return wallet
+
+    def lease(self, count: int) -> List['KeyWallet']:
+        wallets: list = []
+        while len(wallets) < count and self._free:
+            wallets.append(self._lease_wallet(self._free.popleft()))
+        while len(wallets) < count:
+            wallets.append(self._lease_wallet(self._next_index))
+            self._next_index += 1
+
+        self.save()
+        return wallets
+
+    def index_of(self, wallet: 'KeyWallet') -> int:
+        # imported here, since the key store derives its keys with this module
+        from .key_store import StoredKeyWallet
+
+        address = wallet.get_address()
+        if isinstance(wallet, StoredKeyWallet) and self._key_store is not None and wallet.index in self._key_store:
+            index = wallet.index
+        else:
+            index = self._derived_indexes.get(address)
+        if index is None or index >= self._next_index:
+            raise ValueError(f"Wallet {address} was not leased from this pool")
+        return index
+
+    def release(self, wallets: List['KeyWallet']):
+        indexes = [self.index_of(wallet) for wallet in wallets]
+        released = set(self._free).intersection(indexes)
+        if released:
+            raise ValueError(f"Wallets released twice: {sorted(released)}")
+
+        for wallet in wallets:
+            self._derived_indexes.pop(wallet.get_address(), None)
+        self._free.extend(indexes)
+        self.save()
@@ -0,0 +1,294 @@
+import argparse
+import json
+import random
+from math import ceil
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple
+
+from iconsdk.exception import IconServiceBaseException, JSONRPCException
+from iconsdk.icon_service import IconService
+from iconsdk.signed_transaction import SignedTransaction
+from iconsdk.wallet.wallet import KeyWallet
+from tbears.config.tbears_config import TEST1_PRIVATE_KEY
+
+from .json_rpc_api.base import Base, TEST_HTTP_ENDPOINT_URI_V3, ICX_FACTOR
+from .json_rpc_api.batch_provider import BatchHTTPProvider
+from .json_rpc_api.receipt_waiter import ReceiptWaiter
+from .json_rpc_api.session_pool import PooledHTTPProvider
+from .json_rpc_api.signer import BulkSigner
+from .json_rpc_api.wallet_pool import WalletPool
+
+METHODS = ("setStake", "setDelegation", "registerPRep", "claimIScore")
+DEFAULT_MIX = "setStake=4,setDelegation=3,registerPRep=1,claimIScore=2"
+DEFAULT_POOL_PATH = '.load_generator_pool.json'
+LOAD_SEED = 'icon-service-load-generator'
+
+MAX_DELEGATIONS = 10
+ACCOUNT_BALANCE = 1000 * ICX_FACTOR
+PREP_BALANCE = 10 * ICX_FACTOR
+STAKE = 100 * ICX_FACTOR
+DELEGATION = 10 * ICX_FACTOR
+POLL_INTERVAL = 0.2
+STEP_LIMIT = 10_000_000
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for item in mix.split(','):
+        method, weight = item.split('=')
+        if method not in METHODS:
+            raise ValueError(f"Unknown workload method: {method}")
+        weights[method] = int(weight)
+    return weights
+
+
+def percentile(values: List[float], rank: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class MethodStats:
+    def __init__(self):
+        self.sent = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "sent": self.sent,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "p50": percentile(self.latencies, 50),
+            "p95": percentile(self.latencies, 95),
+            "p99": percentile(self.latencies, 99)
+        }
+
+
+class LoadGenerator:
+    """
+    Sends a weighted mix of IISS transactions built by `Base.create_*_tx` at a target rate
+    and measures each one from submission until its receipt is seen.
+    """
+
+    def __init__(self,
+                 url: str = TEST_HTTP_ENDPOINT_URI_V3,
+                 accounts: int = 100,
+                 preps: int = 10,
+                 block_confirm_interval: float = 1,
+                 pool_path: str = DEFAULT_POOL_PATH):
+        self._icon_service = IconService(PooledHTTPProvider(url))
+        self._batch_provider = BatchHTTPProvider(url)
+        self._block_confirm_interval = block_confirm_interval
+        self._signer = BulkSigner()
+        self._funder = KeyWallet.load(bytes.fromhex(TEST1_PRIVATE_KEY))
+        self._pool = WalletPool(pool_path, LOAD_SEED)
+        self._account_count = accounts
+        self._prep_count = preps
+
+        self._accounts: List['KeyWallet'] = []
+        self._preps: List['KeyWallet'] = []
+        self._candidates: List['KeyWallet'] = []
+
+    def _process(self, signed_transactions: List['SignedTransaction']) -> List[dict]:
+        waiter = ReceiptWaiter(self._batch_provider, self._block_confirm_interval)
+        tx_hashes = [self._icon_service.send_transaction(signed_transaction)
+                     for signed_transaction in signed_transactions]
+        for tx_hash in tx_hashes:
+            waiter.add(tx_hash)
+
+        tx_results = dict(waiter.wait())
+        return [tx_results[tx_hash] for tx_hash in tx_hashes]
+
+    def _fund(self, wallets: List['KeyWallet'], balance: int):
+        balances = self._batch_provider.make_batch_request(
+            [('icx_getBalance', {"address": wallet.get_address()}) for wallet in wallets])
+
+        # a failed query must not pass for an empty account and be funded again
+        for current in balances:
+            if not isinstance(current, str):
+                raise JSONRPCException(current)
+
+        # wallets reused from an earlier run only need topping up
+        transactions: list = []
+        for wallet, current in zip(wallets, balances):
+            current = int(current, 16)
+            if current < balance // 2:
+                transaction = Base.build_transfer_icx_tx(self._funder, wallet.get_address(), balance - current)
+                transactions.append((transaction, self._funder))
+
+        if transactions:
+            self._check(self._process(self._signer.sign(transactions)), "transfer")
+
+    @staticmethod
+    def _check(tx_results: List[dict], method: str):
+        failed = [tx_result for tx_result in tx_results if tx_result.get('status') != 1]
+        if failed:
+            raise RuntimeError(f"{len(failed)} {method} transactions failed in setup: {failed[0]}")
+
+    @property
+    def candidate_count(self) -> int:
+        return len(self._candidates)
+
+    def setup(self, registrations: int = 0):
+        """Funds and stakes the accounts, registers the P-Reps to delegate to
+        and funds `registrations` spare wallets for the registerPRep workload."""
+        self._accounts = self._pool.lease(self._account_count)
+        self._preps = self._pool.lease(self._prep_count)
+
+        self._fund(self._accounts, ACCOUNT_BALANCE)
+        self._fund(self._preps, PREP_BALANCE)
+
+        transactions = [(Base.build_register_prep_tx(prep, step_limit=STEP_LIMIT), prep) for prep in self._preps]
+        self._check(self._process(self._signer.sign(transactions)), "registerPRep")
+
+        transactions = [(Base.build_set_stake_tx(account, STAKE), account) for account in self._accounts]
+        self._check(self._process(self._signer.sign(transactions)), "setStake")
+
+        self.add_candidates(registrations)
+
+    def add_candidates(self, count: int):
+        """Funds `count` more spare wallets for the registerPRep workload"""
+        if count <= 0:
+            return
+        candidates = self._pool.lease(count)
+        self._fund(candidates, PREP_BALANCE)
+        self._candidates.extend(candidates)
+
+    def teardown(self):
+        # the accounts stay staked (an unstake is locked for a while) and delegating,
+        # registered P-Reps cannot register again: only the unused candidates go back to the pool
+        self._pool.release(self._candidates)
+        self._candidates = []
+
+    def _build(self, method: str) -> Tuple['SignedTransaction', str]:
+        if method == "registerPRep":
+            prep = self._candidates.pop()
+            return Base.create_register_prep_tx(prep, step_limit=STEP_LIMIT), method
+
+        account = random.choice(self._accounts)
+        if method == "setStake":
+            return Base.create_set_stake_tx(account, random.randint(DELEGATION, STAKE)), method
+        if method == "setDelegation":
+            preps = random.sample(self._preps, min(MAX_DELEGATIONS, len(self._preps)))
+            delegations = [(prep, random.randint(1, DELEGATION // len(preps))) for prep in preps]
+            return Base.create_set_delegation_tx(account, delegations, step_limit=STEP_LIMIT), method
+        return Base.create_claim_iscore_tx(account), method
+
+    def run(self, weights: Dict[str, int], tps: float, duration: float) -> dict:
+        methods = list(weights)
+        if "registerPRep" in weights and not self._candidates:
+            methods.remove("registerPRep")
+        stats: Dict[str, 'MethodStats'] = {method: MethodStats() for method in methods}
+
+        waiter = ReceiptWaiter(self._batch_provider, self._block_confirm_interval)
+        submitted: Dict[str, Tuple[str, float]] = {}
+
+        def collect(completed: List[Tuple[str, dict]]):
+            now = monotonic()
+            for tx_hash, tx_result in completed:
+                method, submitted_at = submitted.pop(tx_hash)
+                if tx_result.get('status') == 1:
+                    stats[method].succeeded += 1
+                    stats[method].latencies.append(now - submitted_at)
+                else:
+                    stats[method].failed += 1
+
+        started_at = monotonic()
+        next_send_at = started_at
+        last_poll_at = started_at
+        interval = 1 / tps
+        while monotonic() - started_at < duration:
+            # poll on its own schedule, so receipts are collected even while sending falls behind
+            now = monotonic()
+            if len(waiter) > 0 and now - last_poll_at >= POLL_INTERVAL:
+                collect(waiter.poll())
+                last_poll_at = now = monotonic()
+            if next_send_at > now:
+                sleep(min(next_send_at - now, POLL_INTERVAL))
+                continue
+
+            method = random.choices(methods, [weights[method] for method in methods])[0]
+            if method == "registerPRep" and not self._candidates:
+                methods.remove(method)
+                if not methods:
+                    break
+                continue
+            signed_transaction, method = self._build(method)
+            stats[method].sent += 1
+            try:
+                tx_hash = self._icon_service.send_transaction(signed_transaction)
+            except IconServiceBaseException:
+                stats[method].errors += 1
+            else:
+                submitted[tx_hash] = (method, monotonic())
+                waiter.add(tx_hash)
+            next_send_at += interval
+
+        sent_for = monotonic() - started_at
+        for completed in waiter.wait():
+            collect([completed])
+        elapsed = monotonic() - started_at
+
+        sent = sum(method_stats.sent for method_stats in stats.values())
+        confirmed = sum(method_stats.succeeded + method_stats.failed for method_stats in stats.values())
+        latencies = [latency for method_stats in stats.values() for latency in method_stats.latencies]
+        return {
+            "targetTps": tps,
+            # a run which sent nothing may also have lasted no time at all
+            "submittedTps": sent / sent_for if sent_for > 0 else 0.0,
+            "achievedTps": confirmed / elapsed if elapsed > 0 else 0.0,
+            "elapsed": elapsed,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "methods": {method: method_stats.to_dict() for method, method_stats in stats.items()}
+        }
+
+
+def print_report(report: dict):
+    print(f"target {report['targetTps']:.1f} TPS, submitted {report['submittedTps']:.1f} TPS, "
+          f"achieved {report['achievedTps']:.1f} TPS in {report['elapsed']:.1f}s")
+    print(f"{'method':<14}{'sent':>8}{'ok':>8}{'failed':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for method, method_stats in report['methods'].items():
+        print(f"{method:<14}{method_stats['sent']:>8}{method_stats['succeeded']:>8}{method_stats['failed']:>8}"
+              f"{method_stats['errors']:>8}{method_stats['p50'] * 1000:>10.0f}{method_stats['p95'] * 1000:>10.0f}"
+              f"{method_stats['p99'] * 1000:>10.0f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="IISS load generator")
+    parser.add_argument('--url', default=TEST_HTTP_ENDPOINT_URI_V3)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="weighted workload, e.g. setStake=4,claimIScore=1")
+    parser.add_argument('--tps', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=60, help="seconds")
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--preps', type=int, default=10)
+    parser.add_argument('--block-confirm-interval', type=float, default=1)
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    share = weights.get("registerPRep", 0) / sum(weights.values())
+    registrations = ceil(args.tps * args.duration * share * 1.2)
+
+    generator = LoadGenerator(args.url, args.accounts, args.preps, args.block_confirm_interval)
+    generator.setup(registrations)
+    try:
+        report = generator.run(weights, args.tps, args.duration)
+    finally:
+        generator.teardown()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+from time import monotonic, sleep
+from typing import Optional
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+NODE_START_TIMEOUT = 60
+
+
+def get_endpoint(config: dict) -> str:
+    return f"http://{config.get('hostAddress', '127.0.0.1')}:{config.get('port', 9000)}/api/v3"
+
+
+def get_last_block(url: str) -> Optional[dict]:
+    request = Request(url,
+                      data=json.dumps({"jsonrpc": "2.0", "method": "icx_getLastBlock", "id": 0}).encode(),
+                      headers={'Content-Type': 'application/json'})
+    try:
+        with urlopen(request, timeout=1) as response:
+            return json.loads(response.read()).get('result')
+    except (URLError, OSError, ValueError):
+        return None
+
+
+def start_node(config_path: str):
+    subprocess.run(['tbears', 'start', '-c', config_path], cwd=os.path.dirname(config_path), check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def stop_node(config_path: str):
+    subprocess.run(['tbears', 'stop', '-c', config_path], cwd=os.path.dirname(config_path),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_node(url: str, timeout: float = NODE_START_TIMEOUT):
+    deadline = monotonic() + timeout
+    while get_last_block(url) is None:
+        if monotonic() > deadline:
+            raise TimeoutError(f"node is not up on {url}")
+        sleep(0.5)
@@ -0,0 +1,719 @@
+import argparse
+import copy
+import json
+import os
+import threading
+from hashlib import sha3_256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import time
+from typing import Dict, List, Optional, Tuple, Union
+
+DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_CONFIG_PATH = os.path.join(DIR_PATH, '..', 'tbears_server_config.json')
+
+SYSTEM_ADDRESS = "cx0000000000000000000000000000000000000000"
+GOVERNANCE_ADDRESS = "cx0000000000000000000000000000000000000001"
+
+DEFAULT_BLOCK_CONFIRM_INTERVAL = 1
+DEFAULT_UNSTAKE_LOCK_PERIOD = 10
+DEFAULT_CALCULATE_PERIOD = 10
+DEFAULT_TERM_PERIOD = 10
+DEFAULT_STEP_PRICE = 10 ** 10
+DEFAULT_STEP = 100_000
+STEP_PER_BYTE = 10
+DEFAULT_IREP = 37_500 * 10 ** 18
+DEFAULT_RREP = 1_200
+MAX_DELEGATIONS = 10
+MAIN_PREP_COUNT = 22
+PREP_COUNT = 100
+
+# I-Score reward, as in test_iscore
+MIN_RREP = 200
+MIN_DELEGATION = 788_400
+REWARD_DIVIDER = 15_768_000 * 10_000 / 1_000
+
+REGISTRATION_KEYS = ("name", "email", "website", "details", "p2pEndPoint", "publicKey")
+SET_PREP_KEYS = ("name", "email", "website", "details", "p2pEndPoint", "irep")
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SCORE_ERROR = -32032
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class ScoreError(Exception):
+    pass
+
+
+class Account:
+    __slots__ = ('balance', 'stake', 'unstake', 'unstake_block_height', 'delegations', 'delegated',
+                 'iscore', 'pending_iscore', 'accrued_iscore', 'reward_since')
+
+    def __init__(self, balance: int = 0):
+        self.balance = balance
+        self.stake = 0
+        self.unstake = 0
+        self.unstake_block_height = 0
+        # [(address, value)] as set by setDelegation
+        self.delegations: List[Tuple[str, int]] = []
+        # delegated to this account by others
+        self.delegated = 0
+        # claimable, computed at the previous calculation, not yet visible
+        self.iscore = 0
+        self.pending_iscore = 0
+        self.accrued_iscore = 0
+        self.reward_since = 0
+
+    @property
+    def total_delegation(self) -> int:
+        return sum(value for _, value in self.delegations)
+
+
+class PRep:
+    __slots__ = ('address', 'registration', 'status', 'block_height', 'tx_index')
+
+    def __init__(self, address: str, registration: dict, block_height: int, tx_index: int):
+        self.address = address
+        self.registration = registration
+        self.status = 0
+        self.block_height = block_height
+        self.tx_index = tx_index
+
+
+def _to_int(value: Union[str, int, None]) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    return int(value, 16)
+
+
+def calculate_iscore(delegation: int, rrep: int, blocks: int) -> int:
+    if delegation < MIN_DELEGATION or rrep < MIN_RREP or blocks <= 0:
+        return 0
+    return int(delegation * rrep * blocks / REWARD_DIVIDER)
+
+
+class NodeStub:
+    """
+    In-memory stand-in for a tbears node serving the JSON-RPC API the suite uses.
+    Transactions are executed as they arrive and, as tbears does, packed into one block with the others
+    received meanwhile; the block is confirmed by the next request other than icx_sendTransaction
+    (a receipt poll, a query), or once it has been open for `blockConfirmInterval` seconds.
+    Signatures are not verified.
+    IISS behaviour (stake, unstake lock, delegation, P-Rep registration, I-Score calculation and claim)
+    follows what the tests expect from iconservice.
+    """
+
+    def __init__(self, config: dict):
+        self._lock = threading.RLock()
+        self._snapshot: Optional[dict] = None
+        self._unstake_lock_period = config.get('iissUnstakeLockPeriod', DEFAULT_UNSTAKE_LOCK_PERIOD)
+        self._calculate_period = config.get('iissCalculatePeriod', DEFAULT_CALCULATE_PERIOD)
+        self._term_period = config.get('termPeriod', DEFAULT_TERM_PERIOD)
+        self._step_price = DEFAULT_STEP_PRICE if config.get('service', {}).get('fee') else 0
+        self._block_confirm_interval = config.get('blockConfirmInterval', DEFAULT_BLOCK_CONFIRM_INTERVAL)
+
+        self._accounts: Dict[str, 'Account'] = {}
+        self._preps: Dict[str, 'PRep'] = {}
+        self._blocks: List[dict] = []
+        self._block_indexes: Dict[str, int] = {}
+        self._tx_results: Dict[str, dict] = {}
+        self._transactions: Dict[str, dict] = {}
+        # tx hash: (transaction, tx result) of the block not confirmed yet, in arrival order
+        self._pending: Dict[str, Tuple[dict, dict]] = {}
+        self._block_opened_at = 0.0
+        self._total_supply = 0
+
+        self._next_calculation = self._calculate_period
+        self._prev_calculation = 0
+        self._iscore_block_height = 0
+        self._next_term = self._term_period
+        # (address, delegated) of the main and sub P-Reps, fixed for a term
+        self._main_preps: List[Tuple[str, int]] = []
+        self._sub_preps: List[Tuple[str, int]] = []
+
+        genesis_transactions = []
+        for genesis_account in config.get('genesis', {}).get('accounts', []):
+            balance = _to_int(genesis_account['balance'])
+            self._account(genesis_account['address']).balance += balance
+            self._total_supply += balance
+            genesis_transactions.append({"address": genesis_account['address'], "balance": genesis_account['balance']})
+        self._append_block([{"accounts": genesis_transactions, "message": "genesis"}])
+
+    @property
+    def height(self) -> int:
+        return len(self._blocks) - 1
+
+    def _state(self) -> dict:
+        return {key: value for key, value in self.__dict__.items() if key not in ('_lock', '_snapshot')}
+
+    def capture(self):
+        with self._lock:
+            self._confirm_block()
+            self._snapshot = copy.deepcopy(self._state())
+
+    def restore(self) -> bool:
+        with self._lock:
+            if self._snapshot is None:
+                return False
+            self.__dict__.update(copy.deepcopy(self._snapshot))
+            return True
+
+    def _account(self, address: str) -> 'Account':
+        account = self._accounts.get(address)
+        if account is None:
+            account = Account()
+            self._accounts[address] = account
+        return account
+
+    def _normalize(self, account: 'Account', block_height: int):
+        if 0 < account.unstake_block_height < block_height:
+            account.balance += account.unstake
+            account.unstake = 0
+            account.unstake_block_height = 0
+
+    def _append_block(self, transactions: List[dict]) -> dict:
+        height = len(self._blocks)
+        prev_block_hash = self._blocks[-1]['block_hash'] if self._blocks else "0" * 64
+        block_hash = sha3_256(f"{prev_block_hash}{height}".encode()).hexdigest()
+        block = {
+            "version": "0.1a",
+            "prev_block_hash": prev_block_hash,
+            "merkle_tree_root_hash": block_hash,
+            "time_stamp": int(time() * 10 ** 6),
+            "confirmed_transaction_list": transactions,
+            "block_hash": block_hash,
+            "height": height,
+            "peer_id": "",
+            "signature": ""
+        }
+        self._blocks.append(block)
+        self._block_indexes[f"0x{block_hash}"] = height
+        return block
+
+    def _confirm_block(self):
+        if not self._pending:
+            return
+
+        block = self._append_block([transaction for transaction, _ in self._pending.values()])
+        for tx_hash, (transaction, tx_result) in self._pending.items():
+            tx_result["blockHeight"] = hex(block['height'])
+            tx_result["blockHash"] = f"0x{block['block_hash']}"
+            self._tx_results[tx_hash] = tx_result
+            self._transactions[tx_hash] = dict(transaction,
+                                               blockHeight=tx_result["blockHeight"],
+                                               blockHash=tx_result["blockHash"],
+                                               txIndex=tx_result["txIndex"])
+        self._pending = {}
+
+        self._on_block(block['height'])
+
+    # ================= JSON-RPC =================
+    def dispatch(self, request: Union[dict, list]) -> Union[dict, list]:
+        if isinstance(request, list):
+            return [self._dispatch_one(item) for item in request]
+        return self._dispatch_one(request)
+
+    def _dispatch_one(self, request: dict) -> dict:
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or 'method' not in request:
+                raise JsonRpcError(INVALID_REQUEST, "Invalid request")
+
+            handler = self._rpc_handlers().get(request['method'])
+            if handler is None:
+                raise JsonRpcError(METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+
+            with self._lock:
+                # anyone looking at the chain sees the transactions sent so far confirmed
+                if request['method'] != 'icx_sendTransaction':
+                    self._confirm_block()
+                result = handler(request.get('params') or {})
+        except JsonRpcError as e:
+            return {"jsonrpc": "2.0", "error": {"code": e.code, "message": e.message}, "id": request_id}
+
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    def _rpc_handlers(self) -> dict:
+        return {
+            'icx_getLastBlock': self._get_last_block,
+            'icx_getBlockByHeight': self._get_block_by_height,
+            'icx_getBlockByHash': self._get_block_by_hash,
+            'icx_getBalance': self._get_balance,
+            'icx_getTotalSupply': self._get_total_supply,
+            'icx_getTransactionResult': self._get_transaction_result,
+            'icx_getTransactionByHash': self._get_transaction_by_hash,
+            'icx_sendTransaction': self._send_transaction,
+            'icx_call': self._call
+        }
+
+    def _get_last_block(self, params: dict) -> dict:
+        return self._blocks[-1]
+
+    def _get_block_by_height(self, params: dict) -> dict:
+        height = _to_int(params.get('height'))
+        if not 0 <= height <= self.height:
+            raise JsonRpcError(INVALID_PARAMS, f"Invalid block height: {height}")
+        return self._blocks[height]
+
+    def _get_block_by_hash(self, params: dict) -> dict:
+        height = self._block_indexes.get(params.get('hash'))
+        if height is None:
+            raise JsonRpcError(INVALID_PARAMS, "Invalid block hash")
+        return self._blocks[height]
+
+    def _get_balance(self, params: dict) -> str:
+        account = self._accounts.get(params.get('address'))
+        if account is None:
+            return hex(0)
+        self._normalize(account, self.height)
+        return hex(account.balance)
+
+    def _get_total_supply(self, params: dict) -> str:
+        return hex(self._total_supply)
+
+    def _get_transaction_result(self, params: dict) -> dict:
+        tx_result = self._tx_results.get(params.get('txHash'))
+        if tx_result is None:
+            raise JsonRpcError(INVALID_PARAMS, "Invalid params txHash")
+        return tx_result
+
+    def _get_transaction_by_hash(self, params: dict) -> dict:
+        transaction = self._transactions.get(params.get('txHash'))
+        if transaction is None:
+            raise JsonRpcError(INVALID_PARAMS, "Invalid params txHash")
+        return transaction
+
+    # ================= Transaction =================
+    def _step_used(self, params: dict) -> int:
+        data = params.get('data')
+        return DEFAULT_STEP + (len(json.dumps(data)) * STEP_PER_BYTE if data is not None else 0)
+
+    def _send_transaction(self, params: dict) -> str:
+        for key in ('from', 'to', 'stepLimit', 'timestamp'):
+            if key not in params:
+                raise JsonRpcError(INVALID_PARAMS, f"Invalid params: {key}")
+
+        from_: str = params['from']
+        to: str = params['to']
+        value: int = _to_int(params.get('value'))
+        step_limit: int = _to_int(params['stepLimit'])
+
+        tx_hash = f"0x{sha3_256(json.dumps(params, sort_keys=True).encode()).hexdigest()}"
+        if tx_hash in self._tx_results or tx_hash in self._pending:
+            raise JsonRpcError(INVALID_REQUEST, "Duplicated transaction")
+
+        if self._pending and time() - self._block_opened_at >= self._block_confirm_interval:
+            self._confirm_block()
+        if not self._pending:
+            self._block_opened_at = time()
+
+        block_height = self.height + 1
+        account = self._account(from_)
+        self._normalize(account, block_height)
+        if account.balance < value + step_limit * self._step_price:
+            raise JsonRpcError(INVALID_REQUEST, "Out of balance")
+
+        step_used = min(self._step_used(params), step_limit)
+        fee = step_used * self._step_price
+
+        tx_result = {
+            "txHash": tx_hash,
+            "txIndex": hex(len(self._pending)),
+            "to": to,
+            "stepUsed": hex(step_used),
+            "stepPrice": hex(self._step_price),
+            "cumulativeStepUsed": hex(step_used),
+            "eventLogs": [],
+            "logsBloom": f"0x{'00' * 256}"
+        }
+
+        try:
+            score_address = self._execute(params, account, fee, block_height)
+        except ScoreError as e:
+            tx_result["status"] = hex(0)
+            tx_result["failure"] = {"code": hex(32), "message": str(e)}
+        else:
+            tx_result["status"] = hex(1)
+            if score_address is not None:
+                tx_result["scoreAddress"] = score_address
+        account.balance -= fee
+
+        transaction = dict(params)
+        transaction["txHash"] = tx_hash
+        self._pending[tx_hash] = (transaction, tx_result)
+        return tx_hash
+
+    def _execute(self, params: dict, account: 'Account', fee: int, block_height: int) -> Optional[str]:
+        to: str = params['to']
+        value: int = _to_int(params.get('value'))
+        data_type: Optional[str] = params.get('dataType')
+        data = params.get('data')
+
+        if account.balance < value + fee:
+            raise ScoreError("Out of balance")
+
+        if data_type == 'deploy':
+            account.balance -= value
+            if to == f"cx{'0' * 40}":
+                return f"cx{sha3_256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:40]}"
+            return to
+
+        if data_type == 'call' and to == SYSTEM_ADDRESS:
+            method = data.get('method')
+            handler = self._transaction_handlers().get(method)
+            if handler is None:
+                raise ScoreError(f"Method not found: {method}")
+            handler(params['from'], data.get('params') or {}, account, value + fee, block_height)
+            account.balance -= value
+            return None
+
+        # transfers, messages and governance calls (e.g. setRevision) only move the value
+        account.balance -= value
+        if to.startswith('hx'):
+            self._account(to).balance += value
+        return None
+
+    def _transaction_handlers(self) -> dict:
+        return {
+            'setStake': self._set_stake,
+            'setDelegation': self._set_delegation,
+            'registerPRep': self._register_prep,
+            'setPRep': self._set_prep,
+            'unregisterPRep': self._unregister_prep,
+            'claimIScore': self._claim_iscore
+        }
+
+    def _set_stake(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        stake = _to_int(params.get('value'))
+        if stake < 0:
+            raise ScoreError(f"Invalid stake: {stake}")
+        if stake < account.total_delegation:
+            raise ScoreError(f"Stake is less than delegated: {stake} < {account.total_delegation}")
+
+        total = account.stake + account.unstake
+        if stake > total:
+            if account.balance < stake - total + reserved:
+                raise ScoreError("Out of balance")
+            account.balance -= stake - total
+            account.unstake = 0
+            account.unstake_block_height = 0
+        elif stake < total:
+            account.unstake = total - stake
+            account.unstake_block_height = block_height + self._unstake_lock_period
+        else:
+            account.unstake = 0
+            account.unstake_block_height = 0
+        account.stake = stake
+
+    def _settle_reward(self, account: 'Account', block_height: int):
+        account.accrued_iscore += calculate_iscore(self._reward_delegation(account), DEFAULT_RREP,
+                                                   block_height - account.reward_since)
+        account.reward_since = block_height
+
+    def _reward_delegation(self, account: 'Account') -> int:
+        return sum(value for address, value in account.delegations
+                   if address in self._preps and self._preps[address].status == 0)
+
+    def _set_delegation(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        delegations: List[Tuple[str, int]] = []
+        for delegation in params.get('delegations', []):
+            delegations.append((delegation['address'], _to_int(delegation['value'])))
+
+        addresses = [delegation_address for delegation_address, _ in delegations]
+        if len(delegations) > MAX_DELEGATIONS:
+            raise ScoreError(f"Too many delegations: {len(delegations)}")
+        if len(set(addresses)) != len(addresses):
+            raise ScoreError("Duplicated address")
+        if any(value < 0 for _, value in delegations):
+            raise ScoreError("Invalid delegation value")
+        if sum(value for _, value in delegations) > account.stake:
+            raise ScoreError("Delegation is greater than stake")
+
+        self._settle_reward(account, block_height)
+        for delegation_address, value in account.delegations:
+            self._account(delegation_address).delegated -= value
+        account.delegations = [(delegation_address, value) for delegation_address, value in delegations if value > 0]
+        for delegation_address, value in account.delegations:
+            self._account(delegation_address).delegated += value
+
+    def _register_prep(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        for key in REGISTRATION_KEYS:
+            if not params.get(key):
+                raise ScoreError(f"Invalid params: {key}")
+        if address in self._preps:
+            raise ScoreError(f"Already registered: {address}")
+
+        registration = {key: params[key] for key in REGISTRATION_KEYS}
+        registration["irep"] = hex(DEFAULT_IREP)
+        registration["irepUpdateBlockHeight"] = hex(block_height)
+        self._preps[address] = PRep(address, registration, block_height, len(self._pending))
+
+        # delegations made before the registration start earning now
+        for delegator in self._accounts.values():
+            if any(delegation_address == address for delegation_address, _ in delegator.delegations):
+                self._settle_reward(delegator, block_height)
+
+    def _set_prep(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        prep = self._preps.get(address)
+        if prep is None or prep.status != 0:
+            raise ScoreError(f"P-Rep not found: {address}")
+        for key in params:
+            if key not in SET_PREP_KEYS:
+                raise ScoreError(f"Invalid params: {key}")
+        if "irep" in params:
+            raise ScoreError("irep can not be set before decentralization")
+
+        prep.registration.update(params)
+
+    def _unregister_prep(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        prep = self._preps.get(address)
+        if prep is None or prep.status != 0:
+            raise ScoreError(f"P-Rep not found: {address}")
+
+        for delegator in self._accounts.values():
+            if any(delegation_address == address for delegation_address, _ in delegator.delegations):
+                self._settle_reward(delegator, block_height)
+        prep.status = 1
+
+    def _claim_iscore(self, address: str, params: dict, account: 'Account', reserved: int, block_height: int):
+        icx = account.iscore // 1000
+        account.iscore -= icx * 1000
+        account.balance += icx
+        self._total_supply += icx
+
+    def _on_block(self, block_height: int):
+        if block_height >= self._next_term:
+            self._next_term += self._term_period
+            preps = [(prep.address, self._account(prep.address).delegated) for prep in self._ranked_preps()]
+            self._main_preps = preps[:MAIN_PREP_COUNT]
+            self._sub_preps = preps[MAIN_PREP_COUNT:PREP_COUNT]
+
+        if block_height < self._next_calculation:
+            return
+
+        # rewards of the period ending here become visible at the next calculation
+        for account in self._accounts.values():
+            if account.delegations:
+                self._settle_reward(account, block_height)
+            account.iscore += account.pending_iscore
+            account.pending_iscore = account.accrued_iscore
+            account.accrued_iscore = 0
+        self._iscore_block_height = self._prev_calculation
+        self._prev_calculation = block_height
+        self._next_calculation = block_height + self._calculate_period
+
+    # ================= Query =================
+    def _call(self, params: dict) -> Union[dict, list, str]:
+        data = params.get('data') or {}
+        if params.get('to') != SYSTEM_ADDRESS:
+            raise JsonRpcError(METHOD_NOT_FOUND, f"SCORE not found: {params.get('to')}")
+
+        handler = self._query_handlers().get(data.get('method'))
+        if handler is None:
+            raise JsonRpcError(METHOD_NOT_FOUND, f"Method not found: {data.get('method')}")
+        return handler(data.get('params') or {})
+
+    def _query_handlers(self) -> dict:
+        return {
+            'getStake': self._get_stake,
+            'getDelegation': self._get_delegation,
+            'getPRep': self._get_prep,
+            'getPRepList': self._get_prep_list,
+            'getMainPRepList': self._get_main_prep_list,
+            'getSubPRepList': self._get_sub_prep_list,
+            'getIISSInfo': self._get_iiss_info,
+            'queryIScore': self._query_iscore
+        }
+
+    def _query_account(self, params: dict) -> 'Account':
+        if 'address' not in params:
+            raise JsonRpcError(INVALID_PARAMS, "Invalid params: address")
+        account = self._account(params['address'])
+        self._normalize(account, self.height)
+        return account
+
+    def _get_stake(self, params: dict) -> dict:
+        account = self._query_account(params)
+        response = {"stake": hex(account.stake)}
+        if account.unstake > 0:
+            response["unstake"] = hex(account.unstake)
+            response["unstakeBlockHeight"] = hex(account.unstake_block_height)
+        return response
+
+    def _get_delegation(self, params: dict) -> dict:
+        account = self._query_account(params)
+        return {
+            "delegations": [{"address": address, "value": hex(value)} for address, value in account.delegations],
+            "totalDelegated": hex(account.total_delegation),
+            "votingPower": hex(account.stake - account.total_delegation)
+        }
+
+    def _prep_info(self, prep: 'PRep', ranking: int = None) -> dict:
+        account = self._account(prep.address)
+        info = {
+            "address": prep.address,
+            "status": hex(prep.status),
+            "grade": hex(2),
+            "stake": hex(account.stake),
+            "delegated": hex(account.delegated),
+            "totalBlocks": hex(0),
+            "validatedBlocks": hex(0)
+        }
+        info.update(prep.registration)
+        if ranking is not None:
+            info["ranking"] = hex(ranking)
+        return info
+
+    def _get_prep(self, params: dict) -> dict:
+        prep = self._preps.get(params.get('address'))
+        if prep is None:
+            raise JsonRpcError(SCORE_ERROR, f"P-Rep not found: {params.get('address')}")
+
+        account = self._account(prep.address)
+        return {
+            "status": hex(prep.status),
+            "grade": hex(2),
+            "registration": dict(prep.registration),
+            "delegation": {"stake": hex(account.stake), "delegated": hex(account.delegated)},
+            "stats": {"totalBlocks": hex(0), "validatedBlocks": hex(0)}
+        }
+
+    def _ranked_preps(self) -> List['PRep']:
+        preps = [prep for prep in self._preps.values() if prep.status == 0]
+        preps.sort(key=lambda prep: (-self._account(prep.address).delegated, prep.block_height, prep.tx_index))
+        return preps
+
+    def _get_prep_list(self, params: dict) -> dict:
+        preps = self._ranked_preps()
+        start_ranking = _to_int(params.get('startRanking')) or 1
+        end_ranking = min(_to_int(params.get('endRanking')) or len(preps), len(preps))
+        if start_ranking < 1 or (preps and start_ranking > len(preps)) or start_ranking > max(end_ranking, 1):
+            raise JsonRpcError(INVALID_PARAMS, f"Invalid ranking: {start_ranking}, {end_ranking}")
+
+        return {
+            "blockHeight": hex(self.height),
+            "startRanking": hex(start_ranking),
+            "totalStake": hex(sum(account.stake for account in self._accounts.values())),
+            "totalDelegated": hex(sum(self._account(prep.address).delegated for prep in preps)),
+            "preps": [self._prep_info(prep, ranking)
+                      for ranking, prep in enumerate(preps[start_ranking - 1:end_ranking], start_ranking)]
+        }
+
+    def _prep_summary(self, preps: List[Tuple[str, int]]) -> dict:
+        return {
+            "blockHeight": hex(self.height),
+            "totalDelegated": hex(sum(delegated for _, delegated in preps)),
+            "preps": [{"address": address, "delegated": hex(delegated)} for address, delegated in preps]
+        }
+
+    def _get_main_prep_list(self, params: dict) -> dict:
+        return self._prep_summary(self._main_preps)
+
+    def _get_sub_prep_list(self, params: dict) -> dict:
+        return self._prep_summary(self._sub_preps)
+
+    def _get_iiss_info(self, params: dict) -> dict:
+        return {
+            "blockHeight": hex(self.height),
+            "nextCalculation": hex(self._next_calculation),
+            "nextPRepTerm": hex(self._next_term),
+            "variable": {
+                "irep": hex(DEFAULT_IREP),
+                "rrep": hex(DEFAULT_RREP)
+            },
+            "rcResult": {
+                "iscore": hex(0),
+                "estimatedICX": hex(0),
+                "startBlockHeight": hex(self._iscore_block_height),
+                "endBlockHeight": hex(self._prev_calculation)
+            }
+        }
+
+    def _query_iscore(self, params: dict) -> dict:
+        account = self._query_account(params)
+        return {
+            "blockHeight": hex(self._iscore_block_height),
+            "iscore": hex(account.iscore),
+            "estimatedICX": hex(account.iscore // 1000)
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # the headers and the body go out in two writes; do not let the second wait for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            request = json.loads(body)
+        except ValueError:
+            response = {"jsonrpc": "2.0", "error": {"code": PARSE_ERROR, "message": "Parse error"}, "id": None}
+        else:
+            response = self.server.node.dispatch(request)
+
+        # iconsdk reads `result` from every 2xx response, so a single error goes out as 400
+        status = 400 if isinstance(response, dict) and 'error' in response else 200
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NodeStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: dict, port: Optional[int] = None):
+        self.node = NodeStub(config)
+        super().__init__((config.get('hostAddress', '127.0.0.1'), port or config.get('port', 9000)), _RequestHandler)
+
+
+def load_config(config_path: str = DEFAULT_CONFIG_PATH) -> dict:
+    with open(config_path) as f:
+        return json.load(f)
+
+
+_server: Optional['NodeStubServer'] = None
+
+
+def ensure_node_stub(config_path: str = DEFAULT_CONFIG_PATH, port: Optional[int] = None) -> 'NodeStubServer':
+    """Starts the stand-in once per process on a daemon thread."""
+    global _server
+
+    if _server is None:
+        _server = NodeStubServer(load_config(config_path), port)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="In-process IISS node stand-in")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="tbears server config with the genesis accounts")
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args(argv)
+
+    server = NodeStubServer(load_config(args.config), args.port)
+    print(f"node stub listening on {server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+from glob import glob
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from .node_control import get_endpoint, start_node, stop_node, wait_for_node
+
+DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+ROOT_PATH = os.path.abspath(os.path.join(DIR_PATH, '..'))
+DEFAULT_CONFIG_PATH = os.path.join(ROOT_PATH, 'tbears_server_config.json')
+DEFAULT_WORK_DIR = os.path.join(ROOT_PATH, '.shards')
+DEFAULT_BASE_PORT = 9100
+TEST_PATTERN = os.path.join(DIR_PATH, 'json_rpc_api', 'test_*.py')
+INIT_TEST = os.path.join(DIR_PATH, 'init_test.py')
+
+
+def find_test_classes(pattern: str = TEST_PATTERN) -> List[Tuple[str, int]]:
+    """(pytest node id, number of test methods) of every Test* class, without importing the modules."""
+    classes: list = []
+    for path in sorted(glob(pattern)):
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name.startswith('Test'):
+                methods = [item for item in node.body
+                           if isinstance(item, ast.FunctionDef) and item.name.startswith('test')]
+                if methods:
+                    classes.append((f"{os.path.relpath(path, ROOT_PATH)}::{node.name}", len(methods)))
+    return classes
+
+
+def assign_shards(classes: List[Tuple[str, int]], shard_count: int) -> List[List[str]]:
+    """Longest-first onto the least loaded shard, weighing classes by their number of test methods."""
+    shards: List[List[str]] = [[] for _ in range(shard_count)]
+    loads = [0] * shard_count
+    for node_id, weight in sorted(classes, key=lambda item: -item[1]):
+        index = loads.index(min(loads))
+        shards[index].append(node_id)
+        loads[index] += weight
+    return [shard for shard in shards if shard]
+
+
+def make_shard_config(config: dict, index: int, shard_dir: str, base_port: int) -> dict:
+    shard_config = json.loads(json.dumps(config))
+    shard_config['port'] = base_port + index
+    shard_config['stateDbRootPath'] = os.path.join(shard_dir, '.statedb')
+    shard_config['scoreRootPath'] = os.path.join(shard_dir, '.score')
+    # nodes on one host must not share message queues or log files
+    shard_config['amqpKey'] = str(int(config.get('amqpKey', 7100)) + index + 1)
+    shard_config['channel'] = f"{config.get('channel', 'loopchain_default')}_{index}"
+    shard_config.setdefault('log', {})['filePath'] = os.path.join(shard_dir, 'tbears.log')
+    return shard_config
+
+
+class Shard:
+    def __init__(self, index: int, node_ids: List[str], config: dict, work_dir: str, base_port: int, stub: bool):
+        self.index = index
+        self.node_ids = node_ids
+        self.dir = os.path.join(work_dir, f"shard{index}")
+        self.config = make_shard_config(config, index, self.dir, base_port)
+        self.config_path = os.path.join(self.dir, 'tbears_server_config.json')
+        self.url = get_endpoint(self.config)
+        self.stub = stub
+        self.log_path = os.path.join(self.dir, 'pytest.log')
+        self.process: Optional[subprocess.Popen] = None
+        self.elapsed = 0.0
+        self._log = None
+        self._started_at = 0.0
+
+    def prepare(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        os.makedirs(self.dir)
+        with open(self.config_path, 'w') as f:
+            json.dump(self.config, f, indent=4)
+
+    def start_node(self):
+        # the node stand-in runs inside the pytest process of the shard
+        if self.stub:
+            return
+        start_node(self.config_path)
+
+    def wait_for_node(self):
+        if self.stub:
+            return
+        wait_for_node(self.url)
+
+    def stop_node(self):
+        if self.stub:
+            return
+        stop_node(self.config_path)
+
+    def run(self, pytest_args: List[str]):
+        env = dict(os.environ,
+                   ICON_TEST_ENDPOINT=self.url,
+                   ICON_TEST_WALLET_POOL=os.path.join(self.dir, '.wallet_pool.json'),
+                   ICON_TEST_METRICS=os.path.join(self.dir, 'metrics'),
+                   ICON_TEST_NODE_CONFIG=self.config_path)
+        if self.stub:
+            env['ICON_TEST_NODE_STUB'] = '1'
+        # shards must not capture and restore each other's chains
+        if os.environ.get('ICON_TEST_SNAPSHOT', '') not in ('', '0'):
+            env['ICON_TEST_SNAPSHOT'] = os.path.join(self.dir, '.snapshot')
+        if os.environ.get('ICON_TEST_PROFILE', '') not in ('', '0'):
+            env['ICON_TEST_PROFILE'] = os.path.join(self.dir, 'profile.folded')
+
+        # every shard starts from a fresh chain, so governance is set up first
+        command = [sys.executable, '-m', 'pytest', os.path.relpath(INIT_TEST, ROOT_PATH)] + self.node_ids + pytest_args
+        self._log = open(self.log_path, 'w')
+        self._started_at = monotonic()
+        self.process = subprocess.Popen(command, cwd=ROOT_PATH, env=env, stdout=self._log, stderr=subprocess.STDOUT)
+
+    def wait(self) -> int:
+        return_code = self.process.wait()
+        self.elapsed = monotonic() - self._started_at
+        self._log.close()
+        return return_code
+
+
+def run_shards(shard_count: int,
+               config_path: str = DEFAULT_CONFIG_PATH,
+               work_dir: str = DEFAULT_WORK_DIR,
+               base_port: int = DEFAULT_BASE_PORT,
+               stub: bool = False,
+               pytest_args: Optional[List[str]] = None) -> Dict[int, int]:
+    with open(config_path) as f:
+        config = json.load(f)
+
+    assignments = assign_shards(find_test_classes(), shard_count)
+    shards = [Shard(index, node_ids, config, work_dir, base_port, stub)
+              for index, node_ids in enumerate(assignments)]
+
+    return_codes: Dict[int, int] = {}
+    try:
+        for shard in shards:
+            shard.prepare()
+            shard.start_node()
+        for shard in shards:
+            shard.wait_for_node()
+            shard.run(pytest_args or [])
+        for shard in shards:
+            return_codes[shard.index] = shard.wait()
+            status = "passed" if return_codes[shard.index] == 0 else f"failed ({shard.log_path})"
+            print(f"shard {shard.index} {status} in {shard.elapsed:.1f}s: {' '.join(shard.node_ids)}")
+    finally:
+        for shard in shards:
+            if shard.process is not None and shard.process.poll() is None:
+                shard.process.kill()
+            shard.stop_node()
+
+    return return_codes
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the test classes on one local node per shard")
+    parser.add_argument('--shards', type=int, default=os.cpu_count())
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="tbears config the shard configs derive from")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="configs, chain data and logs of the shards")
+    parser.add_argument('--base-port', type=int, default=DEFAULT_BASE_PORT)
+    parser.add_argument('--stub', action='store_true', help="run every shard on the in-process node stand-in")
+    args, pytest_args = parser.parse_known_args(argv)
+
+    started_at = monotonic()
+    return_codes = run_shards(args.shards, args.config, args.work_dir, args.base_port, args.stub, pytest_args)
+    failed = [index for index, return_code in return_codes.items() if return_code != 0]
+    print(f"{len(return_codes) - len(failed)}/{len(return_codes)} shards passed in {monotonic() - started_at:.1f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import shutil
+from typing import List, Optional
+
+from .node_control import get_endpoint, start_node, stop_node, wait_for_node
+
+DIR_PATH = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_CONFIG_PATH = os.path.join(DIR_PATH, '..', 'tbears_server_config.json')
+DEFAULT_SNAPSHOT_DIR = os.path.abspath('.snapshot')
+
+# LevelDB never rewrites a table file once written; manifests, logs and locks change in place
+IMMUTABLE_SUFFIXES = ('.ldb', '.sst')
+
+
+def clone_tree(src: str, dst: str, link_all: bool = False):
+    """Copies `src` to `dst`, hardlinking files which are never modified in place instead of copying them."""
+    for root, _, files in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_dir, name)
+            if link_all or name.endswith(IMMUTABLE_SUFFIXES):
+                try:
+                    os.link(source, target)
+                    continue
+                except OSError:
+                    # another filesystem, or no hardlinks there
+                    pass
+            shutil.copy2(source, target)
+
+
+class ChainSnapshot:
+    """
+    Captures the `.statedb` and `.score` directories of the node configured by `config_path`
+    and puts them back later, so a chain prepared once (governance deployed, IISS revision set)
+    is the starting point of every test class instead of being replayed.
+    The node is stopped around both operations, as a live LevelDB can not be copied consistently.
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+        self._config_path = os.path.abspath(config_path)
+        with open(self._config_path) as f:
+            config = json.load(f)
+
+        # tbears resolves them against the directory it was started in, which is the config's
+        base_dir = os.path.dirname(self._config_path)
+        self._state_db_path = os.path.join(base_dir, config['stateDbRootPath'])
+        self._score_path = os.path.join(base_dir, config['scoreRootPath'])
+        self._url = get_endpoint(config)
+        self._snapshot_dir = snapshot_dir
+
+    def exists(self) -> bool:
+        return os.path.isdir(os.path.join(self._snapshot_dir, 'statedb'))
+
+    def _copy(self, state_db_dst: str, score_dst: str, state_db_src: str, score_src: str):
+        for path in (state_db_dst, score_dst):
+            shutil.rmtree(path, ignore_errors=True)
+        clone_tree(state_db_src, state_db_dst)
+        # deployed SCORE files are never modified
+        clone_tree(score_src, score_dst, link_all=True)
+
+    def capture(self):
+        stop_node(self._config_path)
+        try:
+            self._copy(os.path.join(self._snapshot_dir, 'statedb'), os.path.join(self._snapshot_dir, 'score'),
+                       self._state_db_path, self._score_path)
+        finally:
+            start_node(self._config_path)
+            wait_for_node(self._url)
+
+    def restore(self):
+        stop_node(self._config_path)
+        try:
+            self._copy(self._state_db_path, self._score_path,
+                       os.path.join(self._snapshot_dir, 'statedb'), os.path.join(self._snapshot_dir, 'score'))
+        finally:
+            start_node(self._config_path)
+            wait_for_node(self._url)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Capture or restore the chain state of the local node")
+    parser.add_argument('command', choices=('capture', 'restore'))
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH)
+    parser.add_argument('--dir', default=DEFAULT_SNAPSHOT_DIR, help="where the snapshot is kept")
+    args = parser.parse_args(argv)
+
+    snapshot = ChainSnapshot(args.config, args.dir)
+    if args.command == 'capture':
+        snapshot.capture()
+    else:
+        snapshot.restore()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+from math import ceil
+from time import monotonic
+from typing import Dict, List, Optional, Sequence
+
+from .json_rpc_api.base import TEST_HTTP_ENDPOINT_URI_V3
+from .load_generator import DEFAULT_MIX, LoadGenerator, parse_mix
+
+DEFAULT_DURATION = 3600
+DEFAULT_INTERVAL = 60
+# programs (or `python -m` modules) of the processes `tbears start` leaves running
+DEFAULT_NODE_PROGRAMS = ('iconservice', 'iconrpcserver', 'tbears.block_manager.block_manager')
+# registerPRep candidates funded per interval, over what the target rate needs
+REGISTRATION_MARGIN = 1.2
+# growth over the whole run below this share of the fitted start is noise
+DEFAULT_MIN_GROWTH = 0.05
+MIN_TREND_SAMPLES = 3
+
+
+def read_rss(pid: int) -> Optional[int]:
+    """resident set size of `pid` in bytes, None if the process is gone"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def get_program(argv: Sequence[str]) -> str:
+    """
+    What a command line runs: the module of `python -m`, the script a python interpreter runs,
+    the executable otherwise; never one of its arguments.
+    """
+    if not argv:
+        return ''
+    program = os.path.basename(argv[0])
+    if not program.startswith('python'):
+        return program
+
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == '-m':
+            return next(args, '')
+        if not arg.startswith('-'):
+            return os.path.basename(arg)
+    return program
+
+
+def find_pids(programs: Sequence[str]) -> List[int]:
+    """pids of the processes running any of `programs`, as get_program tells, this one excluded"""
+    pids = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        try:
+            with open(f'/proc/{name}/cmdline', 'rb') as f:
+                argv = f.read().rstrip(b'\0').decode(errors='replace').split('\0')
+        except OSError:
+            continue
+        if get_program(argv) in programs:
+            pids.append(int(name))
+    return pids
+
+
+def total_rss(pids: Sequence[int]) -> Optional[int]:
+    """RSS of `pids` together, None if any of them is gone"""
+    total = 0
+    for rss in map(read_rss, pids):
+        if rss is None:
+            return None
+        total += rss
+    return total
+
+
+def is_growing(values: Sequence[Optional[float]], min_growth: float = DEFAULT_MIN_GROWTH) -> bool:
+    """
+    True if the least-squares line through `values` rose by more than `min_growth` of its start
+    over the series, so a leak is still caught when single samples dip.
+    A missing value (None) breaks the series: only the values after the last one are considered.
+    """
+    if None in values:
+        values = values[len(values) - values[::-1].index(None):]
+    count = len(values)
+    if count < MIN_TREND_SAMPLES:
+        return False
+
+    mean_x = (count - 1) / 2
+    mean_y = sum(values) / count
+    slope = (sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+             / sum((x - mean_x) ** 2 for x in range(count)))
+    start = mean_y - slope * mean_x
+    return slope > 0 and slope * (count - 1) > abs(start) * min_growth
+
+
+class SoakRunner:
+    """
+    Runs the load generator's IISS mix (stake, delegation, P-Rep registration, I-Score claim)
+    in back-to-back intervals for `duration` seconds. After each interval it samples the RSS
+    of this process and of the node processes, along with the receipt latency of the interval,
+    and at the end flags every series which kept growing.
+    Node processes are the `node_pids` given, or those running `node_programs`.
+    When one of them is gone, its sample is recorded as missing (None) and, unless the pids were given,
+    the processes are looked up again, as a restarted node; the restart is part of the report.
+    Spare wallets for registerPRep are funded before each interval, as many as the interval needs.
+    """
+
+    def __init__(self,
+                 generator: 'LoadGenerator',
+                 node_pids: Optional[Sequence[int]] = None,
+                 node_programs: Sequence[str] = DEFAULT_NODE_PROGRAMS,
+                 min_growth: float = DEFAULT_MIN_GROWTH):
+        self._generator = generator
+        # fixed pids are not looked up again
+        self._node_programs = None if node_pids else node_programs
+        self._node_pids = list(node_pids) if node_pids else find_pids(node_programs)
+        self._min_growth = min_growth
+        self._samples: List[dict] = []
+        self._restarts: List[dict] = []
+
+    @property
+    def node_pids(self) -> List[int]:
+        return self._node_pids
+
+    def _sample_node_rss(self, elapsed: float) -> Optional[int]:
+        if not self._node_pids:
+            return None
+        rss = total_rss(self._node_pids)
+        if rss is not None:
+            return rss
+
+        gone = [pid for pid in self._node_pids if read_rss(pid) is None]
+        if self._node_programs is None:
+            raise RuntimeError(f"Node processes are gone: {gone}")
+        node_pids = find_pids(self._node_programs)
+        if not node_pids:
+            raise RuntimeError(f"Node processes are gone: {gone}, no node process running")
+
+        print(f"node processes {gone} are gone, sampling {node_pids} from now on")
+        self._restarts.append({"elapsed": elapsed, "gone": gone, "nodePids": node_pids})
+        self._node_pids = node_pids
+        return None
+
+    def sample(self, elapsed: float, report: dict) -> dict:
+        sample = {
+            "elapsed": elapsed,
+            "clientRss": read_rss(os.getpid()),
+            "nodeRss": self._sample_node_rss(elapsed),
+            "achievedTps": report["achievedTps"],
+            "p50": report["p50"],
+            "p95": report["p95"],
+            "p99": report["p99"]
+        }
+        self._samples.append(sample)
+        return sample
+
+    def run(self, weights: Dict[str, int], tps: float, duration: float, interval: float = DEFAULT_INTERVAL) -> dict:
+        share = weights.get("registerPRep", 0) / sum(weights.values())
+        started_at = monotonic()
+        while monotonic() - started_at < duration:
+            run_for = min(interval, duration - (monotonic() - started_at))
+            registrations = ceil(tps * run_for * share * REGISTRATION_MARGIN)
+            self._generator.add_candidates(registrations - self._generator.candidate_count)
+            report = self._generator.run(weights, tps, run_for)
+            print_sample(self.sample(monotonic() - started_at, report))
+
+        return self.report()
+
+    def report(self) -> dict:
+        growth = {
+            key: is_growing([sample[key] for sample in self._samples], self._min_growth)
+            for key in ("clientRss", "nodeRss", "p95")
+        }
+        return {
+            "nodePids": self._node_pids,
+            "restarts": self._restarts,
+            "samples": self._samples,
+            "growth": growth
+        }
+
+
+def _format_rss(rss: Optional[int]) -> str:
+    return f"{rss / 2 ** 20:>8.1f} MiB" if rss is not None else f"{'-':>8}    "
+
+
+def print_sample(sample: dict):
+    print(f"{sample['elapsed']:>8.0f}s  client {_format_rss(sample['clientRss'])}  "
+          f"node {_format_rss(sample['nodeRss'])}  {sample['achievedTps']:>6.1f} TPS  "
+          f"p50 {sample['p50'] * 1000:>6.0f} ms  p95 {sample['p95'] * 1000:>6.0f} ms")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Soak the node with IISS traffic and track memory and latency")
+    parser.add_argument('--url', default=TEST_HTTP_ENDPOINT_URI_V3)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="weighted workload, e.g. setStake=4,claimIScore=1")
+    parser.add_argument('--tps', type=float, default=10)
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="seconds")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between samples")
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--preps', type=int, default=10)
+    parser.add_argument('--block-confirm-interval', type=float, default=1)
+    parser.add_argument('--node-pid', type=int, action='append', help="node process to sample, repeatable")
+    parser.add_argument('--node-program', action='append',
+                        help=f"program or python module the node processes run, repeatable "
+                             f"(default: {', '.join(DEFAULT_NODE_PROGRAMS)})")
+    parser.add_argument('--min-growth', type=float, default=DEFAULT_MIN_GROWTH,
+                        help="growth over the run, as a share of the fitted start, flagged as a leak")
+    parser.add_argument('--output', help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    generator = LoadGenerator(args.url, args.accounts, args.preps, args.block_confirm_interval)
+    runner = SoakRunner(generator, args.node_pid, args.node_program or DEFAULT_NODE_PROGRAMS, args.min_growth)
+    if not runner.node_pids:
+        print("no node process found, node RSS is not sampled")
+
+    # registerPRep candidates are funded interval by interval
+    generator.setup()
+    try:
+        report = runner.run(weights, args.tps, args.duration, args.interval)
+    finally:
+        generator.teardown()
+
+    flagged = [key for key, growing in report["growth"].items() if growing]
+    print(f"growing: {', '.join(flagged)}" if flagged else "nothing kept growing")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,13 @@ import os
 from iconsdk.builder.transaction_builder import CallTransactionBuilder, TransactionBuilder
 from iconsdk.builder.call_builder import CallBuilder
 from iconsdk.icon_service import IconService
-from iconsdk.providers.http_provider import HTTPProvider
 from iconsdk.signed_transaction import SignedTransaction
 from iconsdk.wallet.wallet import KeyWallet
 
 from tbears.libs.icon_integrate_test import IconIntegrateTestBase
 
+from .json_rpc_api.session_pool import PooledHTTPProvider
+
 DIR_PATH = os.path.abspath(os.path.dirname(__file__))
 
 
@@ -21,7 +22,7 @@ class TestScoreTest(IconIntegrateTestBase):
         super().setUp(block_confirm_interval=1, network_only=True)
 
         # if you want to send request to network, uncomment next line and set self.TEST_HTTP_ENDPOINT_URI_V3
-        self.icon_service = IconService(HTTPProvider(self.TEST_HTTP_ENDPOINT_URI_V3))
+        self.icon_service = IconService(PooledHTTPProvider(self.TEST_HTTP_ENDPOINT_URI_V3))
 
     def _make_account(self, balance: int = 1000) -> 'KeyWallet':
         # create account